@@ -348,4 +348,4 @@ def run(target_file):
         print("未选择文件，程序退出")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run(find_excel_file())
\ No newline at end of file
@@ -0,0 +1,169 @@
+import argparse
+import glob
+import multiprocessing
+import sys
+from pathlib import Path
+
+from excel_process import ExcelProcess, ProcessCancelled
+
+
+class ErrCode:
+    """标准错误码常量 (符合 0=成功 约定)"""
+    SUCCESS = 0  # 操作成功
+    INVALID_ARGUMENT = 1  # 无效参数
+    FILE_NOT_FOUND = 2  # 文件不存在
+    TEMPLATE_NOT_FOUND = 3  # 模板文件未找到
+    PROCESS_FAILED = 4  # 总表处理失败（读取失败或没有有效数据）
+    CANCELLED = 130  # 用户中断 (Ctrl+C)
+    UNKNOWN_ERROR = 99  # 未知错误
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="CLI_Tool",
+        description="PM订单分表生成工具（命令行版）：按Location把 APM PM Task Report 拆分为模板分表"
+    )
+    parser.add_argument("reports", nargs="+",
+                        help="PM Task Report 文件，可传多个或通配符；输出到总表旁的 Output，同一文件夹有多个总表时为 Output/<总表名>")
+    parser.add_argument("-e", "--engineer", default="", help="PM 工程师名称")
+    parser.add_argument("-p", "--phone", default="", help="PM 工程师电话")
+    parser.add_argument("-t", "--template", required=True, help="Sample Report 模板 (report_demo.xlsx)")
+    parser.add_argument("--on-hold", action=argparse.BooleanOptionalAction, default=True,
+                        help="是否输出 On Hold 设备（默认输出）")
+    parser.add_argument("--bess-file", help="BESS Asset 列表文件，每行一个或以逗号分隔；指定即启用 BESS")
+    parser.add_argument("--pm-rules", help="PM规则文件 (JSON)，按厂家、型号、Description 和医院指定PM偏移月数")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="并行生成分表的进程数（默认 1）")
+    parser.add_argument("--merge", action="store_true",
+                        help="把所有总表合并（按 Asset ID + HA Work Order No 去重）后一起分表，输出到第一个总表旁的 Output")
+    parser.add_argument("--output-mode", choices=["files", "hospital", "run"], default="files",
+                        help="files: 每个分表一个文件（默认）；hospital: 每个医院一个多工作表工作簿；run: 全部分表一个工作簿")
+    parser.add_argument("--full", action="store_true", help="忽略生成记录，重写全部分表")
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="缓存解析后的总表，总表未变时直接读取缓存（默认启用）")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="分批读取总表并把设备按 Location 暂存到磁盘，适合超大总表（不使用缓存和并行生成）")
+    parser.add_argument("--batch-rows", type=int, default=5000, help="低内存模式每批读取的行数（默认 5000）")
+    parser.add_argument("--pdf", action="store_true", help="生成后用 LibreOffice 把分表导出为 PDF")
+    parser.add_argument("--pdf-workers", type=int, default=2, help="并行导出 PDF 的 LibreOffice 进程数（默认 2）")
+    parser.add_argument("--checklist", help="检查表 PDF 模板 (SafetyTest.pdf)；指定即为每台设备填写检查表")
+    parser.add_argument("--checklist-mode", choices=["asset", "location"], default="asset",
+                        help="asset: 每台设备一个 PDF；location: 每个 Location 合并为一个 PDF")
+    parser.add_argument("--profile", action="store_true", help="把各阶段耗时统计保存为 Output/profile_*.json")
+    return parser.parse_args(argv)
+
+
+def expand_reports(patterns):
+    """展开通配符（Windows 终端不会自动展开），保持输入顺序并去重"""
+    reports = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        reports.extend(Path(match) for match in matches)
+    return list(dict.fromkeys(reports))
+
+
+def output_dirs(batches):
+    """每批的输出目录：与 GUI 相同为总表旁的 Output；同一文件夹有多个总表时各用 Output/<总表名>，
+    避免 TotalModel.xlsx 等每个总表都会生成的文件互相覆盖"""
+    parents = [batch[0].resolve().parent for batch in batches]
+    dirs = []
+    for batch, parent in zip(batches, parents):
+        output_dir = batch[0].parent / "Output"
+        if parents.count(parent) > 1:
+            output_dir = output_dir / batch[0].stem
+        dirs.append(output_dir)
+    return dirs
+
+
+def log(message):
+    print(message, flush=True)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    template_path = Path(args.template)
+    if not template_path.is_file():
+        log(f"错误: 模板文件未找到: {template_path}")
+        return ErrCode.TEMPLATE_NOT_FOUND
+    if args.workers < 1 or args.pdf_workers < 1:
+        log(f"错误: 进程数必须大于 0: {min(args.workers, args.pdf_workers)}")
+        return ErrCode.INVALID_ARGUMENT
+    if args.batch_rows < 1:
+        log(f"错误: 每批行数必须大于 0: {args.batch_rows}")
+        return ErrCode.INVALID_ARGUMENT
+
+    if args.checklist and not Path(args.checklist).is_file():
+        log(f"错误: 检查表模板未找到: {args.checklist}")
+        return ErrCode.TEMPLATE_NOT_FOUND
+
+    bess_text = ""
+    if args.bess_file:
+        try:
+            bess_text = Path(args.bess_file).read_text(encoding="utf-8")
+        except OSError as e:
+            log(f"错误: 无法读取 BESS 列表: {e}")
+            return ErrCode.FILE_NOT_FOUND
+
+    reports = expand_reports(args.reports)
+    missing = [report for report in reports if not report.is_file()]
+    if missing or not reports:
+        for report in missing:
+            log(f"错误: 总表文件不存在: {report}")
+        return ErrCode.FILE_NOT_FOUND
+
+    # 合并模式下所有总表作为一批处理
+    batches = [reports] if args.merge else [[report] for report in reports]
+    dirs = output_dirs(batches)
+
+    result = ErrCode.SUCCESS
+    # 同一进程内依次处理，模板缓存在多个总表之间共用
+    for number, (batch, output_dir) in enumerate(zip(batches, dirs), start=1):
+        if len(batch) > 1:
+            log(f"========== 合并 {len(batch)} 个总表 -> {output_dir} ==========")
+        else:
+            log(f"========== [{number}/{len(batches)}] {batch[0]} ==========")
+        processor = ExcelProcess(
+            args.engineer,
+            args.phone,
+            template_path,
+            batch[0],
+            logger=log,
+            max_workers=args.workers
+        )
+        processor.output_dir = output_dir
+        if len(batch) > 1:
+            processor.merge_reports = batch
+        processor.on_hold_enabled = args.on_hold
+        processor.bess_enabled = bool(args.bess_file)
+        processor.bess_text = bess_text
+        processor.incremental = not args.full
+        processor.report_cache = args.cache
+        processor.low_memory = args.low_memory
+        processor.batch_rows = args.batch_rows
+        processor.output_mode = args.output_mode
+        processor.pm_rule_file = args.pm_rules
+        processor.write_profile = args.profile
+        processor.export_pdf = args.pdf
+        processor.pdf_workers = args.pdf_workers
+        processor.checklist_template = args.checklist
+        processor.checklist_mode = args.checklist_mode
+
+        try:
+            code = ErrCode.SUCCESS if processor.run() else ErrCode.PROCESS_FAILED
+        except (KeyboardInterrupt, ProcessCancelled):
+            log("===========操作已取消!===========")
+            return ErrCode.CANCELLED
+        except Exception as e:
+            log(f"处理出错: {e}")
+            code = ErrCode.UNKNOWN_ERROR
+        # 继续处理其余总表，退出码取第一个失败的错误码
+        if result == ErrCode.SUCCESS:
+            result = code
+
+    return result
+
+
+if __name__ == "__main__":
+    # 打包后的程序使用进程池时需要
+    multiprocessing.freeze_support()
+    sys.exit(main())
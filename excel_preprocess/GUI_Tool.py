@@ -1,19 +1,47 @@
+import time
+
+# 启动计时要在其余导入之前开始：PySide6 和界面模块的导入是冷启动耗时的主要部分
+STARTUP_START = time.perf_counter()
+
+import multiprocessing
 import os
-import re
 import subprocess
 import sys
+import threading
 from pathlib import Path
 
-import pandas as pd
-from PySide6.QtCore import QSettings
+from PySide6.QtCore import QEvent, QObject, QSettings, QThread, QTimer, Signal, Slot
 from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
 
+from log_sink import BatchedLogSink
+from run_profile import RunProfile
 from ui_GEpmToolUI import Ui_GEpmTool
 
 # ========== 預設参数 ==========
 DEFAULT_INITIAL_DIR = Path("/Volumes/SSD 1TB/GEhealthcare")  # or = Path("")
+STARTUP_TARGET = 2.0  # 冷启动（到窗口首次绘制）的目标秒数，可用环境变量 GEPM_STARTUP_TARGET 覆盖
+STARTUP_TARGET_MISSED = 10  # --startup-profile 超过目标时的退出码，与一般错误（1）区分
+
+STARTUP_PROFILE = RunProfile(started=STARTUP_START)
+_startup_last_mark = 0.0
+
+
+def startup_mark(name):
+    """把上一个标记到现在的耗时记为一个启动阶段，返回启动以来的总耗时"""
+    global _startup_last_mark
+    now = STARTUP_PROFILE.elapsed()
+    STARTUP_PROFILE.add_time(name, now - _startup_last_mark)
+    _startup_last_mark = now
+    return now
+
+
+startup_mark('import_gui')
+
+
+def load_excel_process():
+    """延迟导入处理模块：pandas、openpyxl 等较重的依赖在窗口显示后才加载"""
+    from excel_process import ExcelProcess
+    return ExcelProcess
 
 
 # 弹出窗口选择目标文件或文件夹
@@ -54,345 +82,35 @@ def openfolder(path):
         subprocess.Popen(["xdg-open", path])
 
 
-class ExcelProcess:
-    def __init__(self, pm_engineer, pm_phone_number, sample_report_path, output_folder, logger=None):
-        # 将传入的路径规范为 pathlib.Path（若为空则保留 None）
-        self.bessBox = None
-        self.output_folder = Path(output_folder) if output_folder else None
-        self.sample_report_path = Path(sample_report_path) if sample_report_path else None
-        # self.default_report_path = Path("/Volumes/SSD 1TB/GEhealthcare/Doc/report_demo.xlsx")
-        self.pm_engineer = pm_engineer
-        self.pm_phone_number = pm_phone_number
-        self.logger = logger
-
-        # PM规则配置: key为关键字, value为偏移(月数)
-        self.pm_rules = {
-            "DEFIBRILLATOR": 6,  # 加6个月
-            # 可以在此添加其他规则
-        }
-        self.default_pm_offset = 12  # 默认加12个月
-
-        # demo report 對應需填充的设备数据
-        self.col_map = {
-            'Asset ID': 2,
-            'Location': 3,
-            'Remark': 4,
-            'Manufacture': 5,
-            'Model': 6,
-            'Serial No': 7,
-            'Description': 8,
-            'ZT': 9,
-            'HA Work Order No': 10,
-            'Service Report Reference': 14,
-        }
-
-        # 新增：動態標題匹配，不再使用固定列字母
-        # key = 需要的目標欄位名稱, value = 可接受的表頭關鍵字（忽略大小寫）
-        self.dynamic_header_rules = {
-            'Asset ID': ['asset id'],
-            'Hospital': ['hospital'],
-            'Location': ['location'],
-            'Manufacture': ['manufacture'],
-            'Model': ['model'],
-            'Serial No': ['serial no'],
-            'Description': ['description'],
-            'ZT': ['zt'],
-            'HA Work Order No': ['ha work order no'],
-            'Schedule Date': ['schedule date'],
-            'Service Report Reference': ['service report reference'],
-            'Caller': ['caller'],
-            'Caller Tel': ['caller tel'],
-            'Status': ['^status$'] #只接受完全等於「Status」
-        }
-
-    def log(self, message: str):
-        if self.logger:
-            self.logger(message)
-        else:
-            print(message)
-
-    @staticmethod
-    def clean_filename(name):
-        if not isinstance(name, str):
-            name = str(name)
-        # 移除特殊字符，只保留字母、数字、中文、下划线和短横线
-        return re.sub(r'[\\/*?:"<>|]', "", name).strip()
-
-    @staticmethod
-    def get_output_path(self):
-        output_path = MyWindows.get_output_path()
-        return output_path
-
-    def total_model(self, processed_df, output_path):
-        model_stats = (
-            processed_df
-            .groupby(['Manufacture', 'Model', 'Description'])
-            .size()
-            .reset_index(name='Count')
-            .sort_values(by=['Description', 'Manufacture', 'Count'], ascending=[True, True, False])
-        )
-        path = output_path
-        total_model_path = path / "TotalModel.xlsx"
-
-        try:
-            model_stats.to_excel(total_model_path, index=False)
-            # 添加总数量行
-            wb = load_workbook(total_model_path)
-            ws = wb.active
-            total_count = sum(model_stats['Count'])
-            ws.append(["", "", "Total", total_count])
-
-            # 自动调整列宽
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column  # 获取列的数字索引
-                column_letter = get_column_letter(column)
-                for cell in col:
-                    try:
-                        if cell.value:
-                            lines = str(cell.value).splitlines()
-                            cell_length = max(len(line) for line in lines)
-                            if cell_length > max_length:
-                                max_length = cell_length
-                    except:
-                        pass
-                adjusted_width = int(max_length * 1.2) + 6
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            wb.save(total_model_path)
-            self.logger(f"已创建模型统计文件: {total_model_path}")
-
-        except Exception as e:
-            self.logger(f"生成模型统计文件失败: {e}")
+class ProcessWorker(QObject):
+    """在后台线程运行 ExcelProcess，通过信号把日志和进度送回 UI 线程"""
+    log = Signal(str)
+    progress = Signal(int, int)
+    finished = Signal(int)
 
-        return 1
-
-    def generate_location_files(self, location_df, location, output_dir, template_path, chunk_size=20):
-        """为特定Location生成分表文件"""
-        # 清理Location名称用于文件名
-        clean_loc = self.clean_filename(location)
-        if not clean_loc:
-            self.logger(f"无效的Location名称: {location}")
-            return
-
-        # 按Model和Asset ID排序
-        sorted_df = location_df.sort_values(
-            by=['Model', 'Asset ID'],
-            ascending=[True, True]
-        ).reset_index(drop=True)
-
-        # 计算需要分成几个文件
-        num_chunks = (len(sorted_df) + chunk_size - 1) // chunk_size
-
-        for i in range(num_chunks):
-            # 分块处理数据
-            start_idx = i * chunk_size
-            end_idx = min((i + 1) * chunk_size, len(sorted_df))
-            chunk_df = sorted_df.iloc[start_idx:end_idx].copy()
-
-            # 生成文件名
-            suffix = f"({chr(65 + i)})" if i > 0 else ""  # A, B, C...
-            filename = f"{clean_loc}{suffix}.xlsx"
-            output_path = output_dir / filename
-
-            # 创建基于模板的新工作簿
-            wb = load_workbook(template_path)
-            ws = wb.active
-            # 设置打印方向为横向
-            ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
-
-            # 解除设备区域的合并单元格（避免写入错误）
-            merged_ranges = list(ws.merged_cells.ranges)
-            for merged_range in merged_ranges:
-                # 只解除设备数据区域的合并单元格（第8行到第27行）
-                if merged_range.min_row >= 6 and merged_range.min_row <= 25:
-                    ws.unmerge_cells(str(merged_range))
-
-            for local_idx, (_, row) in enumerate(chunk_df.iterrows()):
-                excel_row = local_idx + 6  # local_idx 是每个 chunk 内的行号，从 0 开始
-
-                # 确保行在有效范围内（8-27）
-                if excel_row > 25:
-                    print(f"警告: 行号 {excel_row} 超出模板范围，跳过")
-                    continue
-
-                for field, col in self.col_map.items():
-                    value = row.get(field)
-                    if pd.notna(value):
-                        ws.cell(row=excel_row, column=col).value = value
-
-                # 设置计划日期 (L列)
-                schedule_date = row.get('Schedule Date')
-                if pd.notna(schedule_date):
-                    try:
-                        date_obj = pd.to_datetime(schedule_date)
-                        formatted_date = date_obj.strftime("%b-%Y")
-                        ws.cell(row=excel_row, column=12).value = f"    {formatted_date}"
-                        offset = self.default_pm_offset
-                        description = row.get('Description')
-                        if pd.notna(description):
-                            for keyword, months in self.pm_rules.items():
-                                if keyword in str(description):
-                                    offset = months
-                                    break
-                        pm_due_date = date_obj + pd.DateOffset(months=offset)
-                        ws.cell(row=excel_row, column=11).value = pm_due_date.strftime("%b-%Y")
-                    except Exception as e:
-                        print(f"日期格式错误: {schedule_date}, 错误: {e}")
-
-            # 设置联系人信息（使用第一条记录的信息）
-            if not chunk_df.empty:
-                first_row = chunk_df.iloc[0]
-                # 设置医院信息（将Hospital内容添加到B4原本文本的末尾）
-                if pd.notna(first_row.get('Hospital')):
-                    current_value = ws.cell(row=4, column=2).value or ""
-                    ws.cell(row=4, column=2).value = f"{current_value}{first_row['Hospital']}"
-                if pd.notna(first_row.get('Caller')):
-                    ws.cell(row=28, column=5).value = first_row['Caller']  # E30
-                if pd.notna(first_row.get('Caller Tel')):
-                    ws.cell(row=28, column=7).value = first_row['Caller Tel']  # G30
-                if self.pm_engineer:
-                    ws.cell(row=27, column=5).value = self.pm_engineer  # E27
-                if self.pm_phone_number:
-                    ws.cell(row=27, column=7).value = self.pm_phone_number  # G27
-
-            # 保存文件
-            wb.save(output_path)
-            print(f"已创建分表: {output_path}")
-
-    def preprocess(self):
-        """主处理函数"""
-        # 获取模板文件路径
-        template_path = self.sample_report_path
-        if not template_path or not Path(template_path).exists():
-            self.logger("错误: 模板文件未找到")
-            return 0
-
-        file_path = self.output_folder
-        # 获取当前文件的目录
-        output_dir = Path(file_path).parent / "Output"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        self.logger(f"输出目录: {output_dir}")
+    def __init__(self, processor):
+        super().__init__()
+        self.processor = processor
+        # 处理线程不能直接操作控件，日志和进度全部经由信号转发
+        self.processor.logger = self.log.emit
+        self.processor.progress = self.progress.emit
 
+    @Slot()
+    def run(self):
         try:
-            self.logger(f"正在读取总表文件: {file_path}")
-            # 读取Excel文件
-            df = pd.read_excel(file_path, engine='openpyxl')
-
+            result = self.processor.run()
         except Exception as e:
-            self.logger(f"读取文件失败: {e}")
-            return 0
-
-        # 動態搜尋表頭欄位
-        resolved_columns = {}
-        for target_key, keywords in self.dynamic_header_rules.items():
-            found_col = None
-            for col in df.columns:
-                normalized = str(col).strip().lower()
-                if any(re.fullmatch(pattern, normalized) for pattern in keywords):
-                    found_col = col
-                    break
-            resolved_columns[target_key] = found_col
-            #print(f"已创建分表: {found_col}") #測試尋找表頭是否正確
-        # self.log(f"動態匹配到的欄位: {resolved_columns}")
-        
-        # 解析 bessList
-        bess_assets = []
-        if hasattr(self, "bessList") and hasattr(self, "bessBox") and self.bessBox.isChecked():
-            text = self.bessList.toPlainText()
-            # 去重並保持輸入順序
-            raw_assets = [str(a).strip() for a in re.split(r"[\n,]+", text) if a.strip()]
-            bess_assets = list(dict.fromkeys(raw_assets))
-            self.logger(f"BESS 跟機共: {len(bess_assets)}台")
-            
-        # 创建新的DataFrame用于处理
-        processed_data = []
-
-        # 遍历每一行
-        for _, row in df.iterrows():
-            row_data = {}
-
-            # 处理每一列
-            for col_name, original_col_name in resolved_columns.items():
-                if original_col_name is not None:
-                    value = row[original_col_name]
-
-                    # 型別處理
-                    if col_name in ['Asset ID', 'HA Work Order No']:
-                        try:
-                            # 尝试转换为整数，如果失败则保持原样
-                            value = int(value) if pd.notna(value) else None
-                        except:
-                            pass
-
-                    row_data[col_name] = value
-
-            # 分别处理Accepted和On Hold，且Location非空且非空字符串
-            status_value = row_data.get('Status')
-            location_value = row_data.get('Location')
-            asset_id = row_data.get('Asset ID')
-
-            # BESS 特殊處理
-            asset_id_str = str(asset_id).strip() if pd.notna(asset_id) else ""
-            if bess_assets and asset_id_str in bess_assets:
-                row_data['__status_group'] = 'BESS'
-                row_data['Remark'] = 'BESS'
-                processed_data.append(row_data)
-                #print(f"已找到bess Asset{row_data}")
-                continue  # 已處理，跳過 Accepted/OnHold
-
-            if status_value == 'Accepted' and pd.notna(location_value) and str(location_value).strip() != "":
-                row_data['__status_group'] = 'Accepted'
-                processed_data.append(row_data)
-
-            elif hasattr(self, "onHoldBox") and self.onHoldBox.isChecked() \
-                and status_value == 'On Hold' and pd.notna(location_value) and str(location_value).strip() != "":
-                # On Hold 设备：Location 独立分组，并写 Remark
-                row_data['__status_group'] = 'On Hold'
-                row_data['Remark'] = 'On Hold'
-                processed_data.append(row_data)
-
-        # 创建新的DataFrame
-        processed_df = pd.DataFrame(processed_data)
-        self.logger(f"成功读取文件: 本月共有「 {len(processed_df)} 」部機器")
-
-        if processed_df.empty:
-            self.logger("警告: 没有找到有效的Location数据")
-            return 0
-
-        # 按Location分组处理（On Hold 和 BESS 设备Location独立分组）
-        def group_key(row):
-            if row.get('__status_group') == 'On Hold':
-                return f"{row['Location']}_OnHold"
-            elif row.get('__status_group') == 'BESS':
-                return f"{row['Location']}_BESS"
-            else:
-                return row['Location']
+            self.log.emit(f"处理出错: {e}")
+            result = 0
+        self.finished.emit(result)
 
-        grouped = processed_df.groupby(processed_df.apply(group_key, axis=1))
-
-        self.logger(f"找到 {len(grouped)} 个不同的Location")
-
-        # 为每个Location生成分表
-        for location, group in grouped:
-            self.logger(f"处理Location: {location}, 设备数: {len(group)}")
-            self.generate_location_files(group, location, output_dir, template_path)
-
-        self.total_model(processed_df, output_dir)
-
-        return 1
-
-    def run(self):
-        result = self.preprocess()
-        if result:
-            self.logger("===========操作完成!==========")
-        else:
-            self.logger("===========操作失敗!===========")
+    def cancel(self):
+        self.processor.cancel()
 
 
 class MyWindows(QMainWindow, Ui_GEpmTool):
     # 屬性配置
-    def __init__(self):
+    def __init__(self, startup_report=False):
         super().__init__()
         self.setupUi(self)
         self.bind()
@@ -400,6 +118,14 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
         self.report_path = None  # config["paths"]["report_path"]
         self.settings = QSettings("GEpmTool", "UserConfig")
         self.load_settings()
+        # 日志先缓冲再定时批量输出到窗口，完整日志写到 Output 目录
+        self.log_sink = BatchedLogSink(self.plainTextEdit, max_blocks=self.log_max_blocks, parent=self)
+        self.worker = None
+        self.worker_thread = None
+        # 启动耗时统计：startup_report 为 True 时在首次绘制和预加载完成后输出并退出
+        self.startup_report = startup_report
+        self.first_paint_time = None
+        self.warmup_thread = None
 
     def bind(self):
         self.pushButton.clicked.connect(self.process)
@@ -408,6 +134,8 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
         self.pushButton_4.clicked.connect(self.log_clear)
         self.toolButton.clicked.connect(self.set_sample_path)
         self.toolButton_2.clicked.connect(self.set_output_path)
+        self.toolButton_3.clicked.connect(self.set_pm_rule_path)
+        self.toolButton_4.clicked.connect(self.set_checklist_path)
         self.bessBox.setChecked(False)
         self.onHoldBox.setChecked(True)
         self.bessList.setPlainText("")
@@ -421,6 +149,18 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
         self.lineEdit_6.setText(self.settings.value("output_path", ""))  # 目標表格路徑
         self.bessBox.setChecked(self.settings.value("bessBox_checked", True, type=bool))
         self.onHoldBox.setChecked(self.settings.value("onHoldBox_checked", True, type=bool))
+        self.workersBox.setValue(self.settings.value("max_workers", 1, type=int))  # 并行生成进程数
+        self.incrementalBox.setChecked(self.settings.value("incremental", True, type=bool))  # 只重写有变化的分表
+        self.report_cache = self.settings.value("report_cache", True, type=bool)  # 缓存解析后的总表
+        self.lowMemoryBox.setChecked(self.settings.value("low_memory", False, type=bool))  # 分批读取超大总表
+        self.outputModeBox.setCurrentText(self.settings.value("output_mode", "files"))  # files / hospital / run
+        self.lineEdit_7.setText(self.settings.value("pm_rule_file", ""))  # PM规则文件，空为使用内置规则
+        self.write_profile = self.settings.value("write_profile", False, type=bool)  # 保存耗时统计 JSON
+        self.pdfBox.setChecked(self.settings.value("export_pdf", False, type=bool))  # 生成后导出 PDF
+        self.pdf_workers = self.settings.value("pdf_workers", 2, type=int)  # 并行 LibreOffice 进程数
+        self.lineEdit_8.setText(self.settings.value("checklist_template", ""))  # 检查表模板，空为不生成
+        self.checklist_mode = self.settings.value("checklist_mode", "asset")  # asset / location
+        self.log_max_blocks = self.settings.value("log_max_blocks", 5000, type=int)  # 日志窗口最多保留的行数
 
     def save_settings(self):
         self.settings.setValue("pm_engineer", self.lineEdit.text())
@@ -429,6 +169,18 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
         self.settings.setValue("output_path", self.lineEdit_6.text())
         self.settings.setValue("bessBox_checked", self.bessBox.isChecked())
         self.settings.setValue("onHoldBox_checked", self.onHoldBox.isChecked())
+        self.settings.setValue("max_workers", self.workersBox.value())
+        self.settings.setValue("incremental", self.incrementalBox.isChecked())
+        self.settings.setValue("report_cache", self.report_cache)
+        self.settings.setValue("low_memory", self.lowMemoryBox.isChecked())
+        self.settings.setValue("output_mode", self.outputModeBox.currentText())
+        self.settings.setValue("pm_rule_file", self.lineEdit_7.text())
+        self.settings.setValue("write_profile", self.write_profile)
+        self.settings.setValue("export_pdf", self.pdfBox.isChecked())
+        self.settings.setValue("pdf_workers", self.pdf_workers)
+        self.settings.setValue("checklist_template", self.lineEdit_8.text())
+        self.settings.setValue("checklist_mode", self.checklist_mode)
+        self.settings.setValue("log_max_blocks", self.log_max_blocks)
 
     def set_sample_path(self):
         file_path = find_path(select_folder=False)
@@ -440,6 +192,16 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
         if file_path:
             self.lineEdit_6.setText(file_path)  # 把路徑填寫到 lineEdit_6
 
+    def set_pm_rule_path(self):
+        file_path = find_path(select_folder=False)
+        if file_path:
+            self.lineEdit_7.setText(file_path)  # 把路徑填寫到 lineEdit_7
+
+    def set_checklist_path(self):
+        file_path = find_path(select_folder=False)
+        if file_path:
+            self.lineEdit_8.setText(file_path)  # 把路徑填寫到 lineEdit_8
+
     def path_check(self, line, path_str):
         if os.path.isdir(path_str):  # 如果 lineEdit_6內容為非法路徑
             QMessageBox.warning(self, "提示", f"請選用正確的{line}")
@@ -467,6 +229,11 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
             openfolder(file_path)
 
     def process(self):
+        # 处理进行中时按钮作为取消使用
+        if self.worker_thread is not None:
+            self.cancel_process()
+            return
+
         pm_engineer = self.lineEdit.text()
         pm_phone_number = self.lineEdit_2.text()
         sample_report_path = self.lineEdit_5.text()
@@ -474,35 +241,127 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
         if self.path_check("Sample_Report_File", sample_report_path):
             if self.path_check("Target File", output_path):
                 # 把UI裡對應的信息和接口傳給ExcelProcess類函數運行
-                processor = ExcelProcess(
+                processor = load_excel_process()(
                     pm_engineer,
                     pm_phone_number,
                     sample_report_path,
                     output_path,
-                    logger=self.log_output
+                    logger=self.log_output,
+                    max_workers=self.workersBox.value()
                     )
 
-                # 將 UI 的 BESS/OnHold 控件和 bessList 傳給 processor
-                # 注意：processor 內部會用 hasattr 判斷控件是否存在
-                processor.bessBox = getattr(self, "bessBox", None)
-                processor.onHoldBox = getattr(self, "onHoldBox", None)
-                processor.bessList = getattr(self, "bessList", None)
+                # 將 UI 的 BESS/OnHold 選項和 bessList 內容傳給 processor
+                # 注意：處理在後台線程進行，只能傳值，不能傳控件
+                processor.bess_enabled = self.bessBox.isChecked()
+                processor.on_hold_enabled = self.onHoldBox.isChecked()
+                processor.bess_text = self.bessList.toPlainText()
+                processor.incremental = self.incrementalBox.isChecked()
+                processor.report_cache = self.report_cache
+                processor.low_memory = self.lowMemoryBox.isChecked()
+                processor.output_mode = self.outputModeBox.currentText()
+                processor.pm_rule_file = self.lineEdit_7.text() or None
+                processor.write_profile = self.write_profile
+                processor.export_pdf = self.pdfBox.isChecked()
+                processor.pdf_workers = self.pdf_workers
+                processor.checklist_template = self.lineEdit_8.text() or None
+                processor.checklist_mode = self.checklist_mode
 
-                processor.run()
                 self.save_settings()
+                self.log_sink.open_file(self.get_output_path())
+                self.start_worker(processor)
+
+    def start_worker(self, processor):
+        """把 ExcelProcess 放到 QThread 中運行，避免界面卡死"""
+        self.worker_thread = QThread(self)
+        self.worker = ProcessWorker(processor)
+        self.worker.moveToThread(self.worker_thread)
+
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.log.connect(self.log_output)
+        self.worker.progress.connect(self.show_progress)
+        self.worker.finished.connect(self.process_finished)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker_thread.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
+
+        self.pushButton.setText("Cancel")
+        self.statusbar.showMessage("處理中...")
+        self.worker_thread.start()
+
+    def cancel_process(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.pushButton.setEnabled(False)
+            self.statusbar.showMessage("正在取消，當前分表完成後停止...")
+
+    def show_progress(self, done, total):
+        self.statusbar.showMessage(f"Location 進度: {done}/{total}")
+
+    def process_finished(self, result):
+        self.log_sink.close_file()
+        self.worker = None
+        self.worker_thread = None
+        self.pushButton.setText("Generate")
+        self.pushButton.setEnabled(True)
+        self.statusbar.showMessage("完成" if result else "未完成", 5000)
+
+    def event(self, event):
+        if event.type() == QEvent.Paint and self.first_paint_time is None:
+            self.first_paint_time = startup_mark('first_paint')
+            # 首次绘制后再在后台预加载处理模块（与界面并行，不计入首次绘制），不拖慢窗口显示
+            QTimer.singleShot(0, self.warm_up)
+        return super().event(event)
+
+    def warm_up(self):
+        """后台线程预先导入处理模块，按 Generate 时通常已加载完成"""
+        def run():
+            start = time.perf_counter()
+            try:
+                load_excel_process()
+            except Exception:
+                # 导入失败留到按 Generate 时再报告
+                return
+            STARTUP_PROFILE.add_time('warmup_import', time.perf_counter() - start)
+
+        self.warmup_thread = threading.Thread(target=run, name="WarmUp", daemon=True)
+        self.warmup_thread.start()
+        if self.startup_report:
+            QTimer.singleShot(0, self.report_startup)
+
+    def report_startup(self):
+        """输出启动耗时；首次绘制超过目标时退出码为 STARTUP_TARGET_MISSED"""
+        self.warmup_thread.join()
+        target = float(os.environ.get("GEPM_STARTUP_TARGET", STARTUP_TARGET))
+        for line in STARTUP_PROFILE.summary_lines():
+            print(line)
+        if self.first_paint_time > target:
+            print(f"警告: 启动到首次绘制 {self.first_paint_time:.3f}s，超过目标 {target:.3f}s")
+        else:
+            print(f"启动到首次绘制 {self.first_paint_time:.3f}s，目标 {target:.3f}s 以内")
+        QApplication.exit(STARTUP_TARGET_MISSED if self.first_paint_time > target else 0)
 
     # 退出程序
     def exit_program(self):
         self.close()
 
+    def closeEvent(self, event):
+        # 關閉窗口前先取消後台處理並等待線程結束
+        if self.worker_thread is not None:
+            # 先設置取消標記再 wait()：處理線程在下一個分表前停止，並行生成時等待子進程期間也會檢查
+            self.worker.cancel()
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+        self.log_sink.close_file()
+        super().closeEvent(event)
+
     # UI輸出log的接口
     def log_output(self, text):
-        """將日誌消息輸出到 UI 的 plainTextEdit"""
-        self.plainTextEdit.appendPlainText(text)
+        """將日誌消息交給緩衝輸出，定時批量寫到 UI 的 plainTextEdit"""
+        self.log_sink.append(text)
 
     # 清空log的窗口
     def log_clear(self):
-        self.plainTextEdit.clear()
+        self.log_sink.clear()
 
     def show_guide(self):
         QMessageBox.information(self, 'Guide',
@@ -510,14 +369,19 @@ class MyWindows(QMainWindow, Ui_GEpmTool):
                                 'Step2:填自己電話\n'
                                 'Step3:SampleReport->找Koen\n'
                                 'Step4:TargetFile->APM獲取PMTaskReport\n'
-                                'Step5:按需要勾選OnHold或BESS\n'
+                                'Step5:按需要勾選OnHold或BESS及其他選項,可選PM規則及檢查表模板\n'
                                 'Step6:輸入BESS Asset,每個Asset回車換行(如無可跳過)\n'
                                 'Step7:點擊Generate\n'
                                 'Step8:點擊OutputFolder查看生成文件')
 
 
 if __name__ == '__main__':
+    # 打包后的程序使用进程池时需要
+    multiprocessing.freeze_support()
+    # --startup-profile 或环境变量 GEPM_STARTUP_PROFILE=1：输出启动耗时后退出
+    startup_report = "--startup-profile" in sys.argv or os.environ.get("GEPM_STARTUP_PROFILE") == "1"
     app = QApplication([])
-    window = MyWindows()
+    window = MyWindows(startup_report=startup_report)
+    startup_mark('window_init')
     window.show()
-    app.exec()
+    sys.exit(app.exec())
@@ -0,0 +1,68 @@
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+
+def write_atomic(path, data):
+    """先写到同目录的临时文件再改名，读取方不会看到写了一半的文件"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+
+class AsyncFileWriter:
+    """后台线程写出文件，让下一个分表的生成和上一个文件的磁盘写入重叠
+
+    队列最多保留 max_pending 个待写文件，满时 submit 阻塞（背压），内存占用有上限。
+    写入失败不中断处理，close() 时返回 [(路径, 错误)]。
+    """
+
+    def __init__(self, max_pending=8, profile=None):
+        self.queue = queue.Queue(maxsize=max(1, max_pending))
+        self.profile = profile
+        self.errors = []
+        self.thread = threading.Thread(target=self._run, name="AsyncFileWriter", daemon=True)
+        self.thread.start()
+
+    def submit(self, path, data, on_written=None):
+        """on_written(path) 在写入成功后于写入线程中调用"""
+        self.queue.put((Path(path), data, on_written))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            path, data, on_written = item
+            start = time.perf_counter()
+            try:
+                write_atomic(path, data)
+                if on_written is not None:
+                    on_written(path)
+            except Exception as e:
+                self.errors.append((path, e))
+            finally:
+                if self.profile is not None:
+                    self.profile.add_time('file_write', time.perf_counter() - start)
+
+    def close(self):
+        """等待队列中的文件全部写完，返回写入失败的文件"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        return self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,238 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from excel_process import ExcelProcess
+
+# APM PM Task Report 的列（与 dynamic_header_rules 对应的列夹在其他列之间）
+REPORT_COLUMNS = [
+    'No', 'Type', 'Priority', 'Asset ID', 'Site', 'Hospital', 'Department', 'Cost',
+    'Caller', 'Caller Tel', 'Location', 'Manufacture', 'Model', 'Serial No',
+    'Description', 'Status', 'HA Work Order No', 'Schedule Date', 'Service Report Reference', 'ZT',
+]
+
+# 表头变体：都应被 dynamic_header_rules 正确识别
+HEADER_STYLES = {
+    'standard': lambda name: name,
+    'upper': lambda name: name.upper(),
+    'padded': lambda name: f" {name} ",
+}
+
+DESCRIPTIONS = ['DEFIBRILLATOR', 'MONITOR, PATIENT', 'PUMP, INFUSION', 'ECG DEFIBRILLATOR UNIT', 'VENTILATOR']
+MANUFACTURES = {'GE': ['B40', 'B650', 'MAC2000'], 'Philips': ['MX450', 'HeartStart'], 'Mindray': ['BeneView', 'SP5']}
+
+
+def parse_status_mix(text):
+    """'Accepted=0.7,On Hold=0.2,Closed=0.1' -> {状态: 权重}"""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_report(path, rows, locations=50, status_mix=None, bess_fraction=0.0, header_style='standard',
+                shuffle_columns=False, extra_columns=20, seed=1, location_prefix='KWH'):
+    """生成合成 PM Task Report，返回 BESS Asset ID 列表"""
+    rnd = random.Random(seed)
+    status_mix = status_mix or {'Accepted': 0.7, 'On Hold': 0.2, 'Closed': 0.1}
+    statuses, weights = list(status_mix), list(status_mix.values())
+    location_names = [f"{location_prefix}-{chr(65 + k % 26)}{k // 26}-W{k}" for k in range(locations)]
+    hospitals = ['KWH', 'QEH', 'PYN']
+
+    columns = REPORT_COLUMNS + [f'Extra {i}' for i in range(extra_columns)]
+    order = list(range(len(columns)))
+    if shuffle_columns:
+        rnd.shuffle(order)
+    rename = HEADER_STYLES[header_style]
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append([rename(columns[i]) for i in order])
+
+    bess_assets = []
+    for i in range(rows):
+        asset_id = 1000000 + i
+        manufacture = rnd.choice(list(MANUFACTURES))
+        location_idx = rnd.randrange(locations)
+        status = rnd.choices(statuses, weights)[0]
+        if rnd.random() < bess_fraction:
+            bess_assets.append(str(asset_id))
+        values = [
+            i + 1, 'PM', 'P3', asset_id, 'KW', hospitals[location_idx % len(hospitals)], 'DEPT', 0,
+            f'Caller {location_idx}', 23450000 + location_idx, location_names[location_idx],
+            manufacture, rnd.choice(MANUFACTURES[manufacture]), f'SN{i:07d}',
+            rnd.choice(DESCRIPTIONS), status, 50000000 + i,
+            datetime(2025, rnd.randint(1, 12), rnd.randint(1, 28)), f'SR{i:07d}', f'ZT{i % 7}',
+        ] + [f'x{i % 97}'] * extra_columns
+        ws.append([values[j] for j in order])
+    wb.save(path)
+    return bess_assets
+
+
+def make_template(path):
+    """生成与 generate_location_files 写入位置一致的简化模板（第6-25行设备区，第27-28行联系人）"""
+    wb = Workbook()
+    ws = wb.active
+    ws['B2'] = 'PM Service Report'
+    ws['B4'] = 'Hospital: '
+    for col, title in enumerate(['Asset ID', 'Location', 'Remark', 'Manufacture', 'Model', 'Serial No',
+                                 'Description', 'ZT', 'HA Work Order No', 'PM Due', 'Schedule', '', 'SR Ref'],
+                                start=2):
+        ws.cell(row=5, column=col, value=title)
+    for row in range(6, 26, 2):
+        ws.merge_cells(start_row=row, start_column=13, end_row=row + 1, end_column=13)
+    ws['B27'] = 'PM Engineer'
+    ws['B28'] = 'Contact'
+    wb.save(path)
+
+
+def peak_rss_mb():
+    """本进程和已结束子进程的峰值内存 (MB)；没有 resource 模块时尝试 psutil"""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource:
+        # Linux 单位为 KB，macOS 为字节
+        scale = 1 if sys.platform == 'darwin' else 1024
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+        return own / 2 ** 20, children / 2 ** 20
+    try:
+        import psutil
+    except ImportError:
+        return None, None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss) / 2 ** 20, None
+
+
+def run_case(report_path, template_path, bess_assets, workers, engine, conn):
+    """在独立进程中运行一次完整处理，保证峰值内存互不影响"""
+    # 屏蔽标准输出（文件描述符级别，子进程同样继承），处理日志收集到 messages
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    messages = []
+    processor = ExcelProcess('Bench', '00000000', template_path, report_path,
+                             logger=messages.append, max_workers=workers)
+    processor.on_hold_enabled = True
+    processor.bess_enabled = bool(bess_assets)
+    processor.bess_text = "\n".join(bess_assets)
+    processor.incremental = False
+    processor.read_engine = engine
+
+    started = time.perf_counter()
+    result = processor.run()
+    elapsed = time.perf_counter() - started
+    rss, children_rss = peak_rss_mb()
+    conn.send({
+        'result': result,
+        'seconds': elapsed,
+        'files': len(processor.manifest_entries),
+        'peak_rss_mb': rss,
+        'workers_peak_rss_mb': children_rss,
+        'profile': processor.profile.to_dict(),
+        'errors': [m for m in messages if '失败' in m or '错误' in m],
+    })
+    conn.close()
+
+
+def measure(report_path, template_path, bess_assets, workers, engine):
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=run_case, args=(report_path, template_path, bess_assets, workers, engine, child))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {'result': 0, 'errors': [f'benchmark process exited with code {process.exitcode}']}
+    process.join()
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ExcelProcess 性能测试：生成合成总表并记录各阶段耗时和内存")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help="总表行数（可多个，1k-200k）")
+    parser.add_argument('--locations', type=int, default=50, help="Location 数量")
+    parser.add_argument('--status-mix', default='Accepted=0.7,On Hold=0.2,Closed=0.1', help="Status 比例")
+    parser.add_argument('--bess-fraction', type=float, default=0.02, help="BESS 设备比例")
+    parser.add_argument('--headers', nargs='+', default=['standard'], choices=sorted(HEADER_STYLES),
+                        help="表头变体")
+    parser.add_argument('--shuffle-columns', action='store_true', help="打乱总表列顺序")
+    parser.add_argument('--extra-columns', type=int, default=20, help="与处理无关的额外列数")
+    parser.add_argument('-j', '--workers', type=int, nargs='+', default=[1], help="并行进程数（可多个）")
+    parser.add_argument('--engine', default='auto', choices=['auto', 'calamine', 'stream', 'full'],
+                        help="总表读取方式")
+    parser.add_argument('--repeat', type=int, default=1, help="每组参数重复次数")
+    parser.add_argument('--template', help="使用指定模板（默认生成简化模板）")
+    parser.add_argument('--workdir', help="工作目录（默认临时目录，结束后删除）")
+    parser.add_argument('--json', help="把结果保存为 JSON 文件")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    status_mix = parse_status_mix(args.status_mix)
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix='gepm_bench_'))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    template_path = Path(args.template) if args.template else workdir / 'template.xlsx'
+    if not args.template:
+        make_template(template_path)
+
+    results = []
+    try:
+        for rows, header in itertools.product(args.rows, args.headers):
+            case_dir = workdir / f"{rows}_{header}"
+            shutil.rmtree(case_dir, ignore_errors=True)
+            case_dir.mkdir(parents=True)
+            report_path = case_dir / 'report.xlsx'
+            started = time.perf_counter()
+            bess_assets = make_report(report_path, rows, args.locations, status_mix, args.bess_fraction,
+                                      header, args.shuffle_columns, args.extra_columns)
+            print(f"生成总表 {rows} 行 ({header}): {time.perf_counter() - started:.1f}s", flush=True)
+
+            for workers in args.workers:
+                for attempt in range(args.repeat):
+                    result = measure(report_path, template_path, bess_assets, workers, args.engine)
+                    result.update(rows=rows, header=header, workers=workers, attempt=attempt)
+                    results.append(result)
+                    print_result(result)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0 if all(result.get('result') for result in results) else 1
+
+
+def print_result(result):
+    if not result.get('result'):
+        print(f"rows={result['rows']} header={result['header']} workers={result['workers']}: 失败 {result['errors']}")
+        return
+    seconds = result['seconds']
+    rss = result['peak_rss_mb']
+    print(f"rows={result['rows']} header={result['header']} workers={result['workers']}: "
+          f"{seconds:.2f}s, {result['files']} files ({result['files'] / seconds:.1f} files/s), "
+          f"peak RSS {'-' if rss is None else f'{rss:.0f}'} MB")
+    for name, stage in result['profile']['stages'].items():
+        print(f"    {name:<20}{stage['seconds']:>9.3f}s  x{stage['calls']}")
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
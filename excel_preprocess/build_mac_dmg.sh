@@ -36,6 +36,7 @@ pyinstaller \
     --add-data "$SCRIPT_ROOT/ui_GEpmToolUI.py:." \
     --add-data "$(dirname "$SCRIPT_ROOT")/Doc/report_demo.xlsx:Doc" \
     --add-data "$(dirname "$SCRIPT_ROOT")/Doc/logo.png:Doc" \
+    --hidden-import python_calamine \
     "$SCRIPT_ROOT/GUI_Tool.py"
 
 APP_PATH="$OUTPUT_DIR/dist/GEpmTool.app"
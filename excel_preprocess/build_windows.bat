@@ -33,6 +33,7 @@ pyinstaller ^
     --add-data "%~dp0ui_GEpmToolUI.py;." ^
     --add-data "%~dp0..\Doc\report_demo.xlsx;Doc" ^
     --add-data "%~dp0..\Doc\logo.png;Doc" ^
+    --hidden-import python_calamine ^
     GUI_Tool.py
 
 REM �T�{ EXE �O�_�ͦ�
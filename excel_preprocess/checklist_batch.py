@@ -0,0 +1,236 @@
+import io
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+# pdf里对应的框（与 SafetyTest.pdf 表单字段对应）
+PDF_FIELD_MAPPING = {
+    "Text1": "Hospital",
+    "Text2": "Location",
+    "Text3": "Tester",
+    "Text4": "Asset",
+    "Text5": "CheckedBy",
+    "Text6": "TesterSerial",
+    "Text8": "CheckedDate",
+    "Text9": "TesterCalDay",
+    "Text10": "Voltage",
+    "1": "ClassType",  # Checkbox for Class I
+    "2": "ClassType",  # Checkbox for Class II
+    "4": "ModelType",  # Checkbox for B
+    "5": "ModelType",  # Checkbox for BF
+    "6": "ModelType"  # Checkbox for CF
+}
+
+# 复选框字段 -> 勾选时对应的值
+CHECKBOX_VALUES = {'1': '1', '2': '2', '4': 'B', '5': 'BF', '6': 'CF'}
+
+# 不随设备变化的默认填写内容（可被 defaults 参数覆盖）
+DEFAULT_VALUES = {
+    'Tester': 'SA-2010S',
+    'TesterSerial': '73385039',
+    'TesterCalDay': '30-Dec-2026',
+    'ClassType': '2',
+    'ModelType': 'BF',
+    'Mechanism': '0',
+    'DC': '0',
+    'Battery': '0',
+    'Voltage': '219'
+}
+
+# 每个进程缓存解析后的模板，避免每台设备重新解析；{路径: ((大小, 修改时间), FormTemplate)}
+_template_cache = {}
+
+
+class FormTemplate:
+    """解析一次的检查表模板：每台设备从已解析的文档复制一份再填写"""
+
+    def __init__(self, template_path):
+        from pypdf import PdfReader
+
+        self.reader = PdfReader(io.BytesIO(Path(template_path).read_bytes()))
+        # 复选框的勾选状态名（/Yes、/On 等，由模板决定）
+        self.on_states = {}
+        for name, field in (self.reader.get_fields() or {}).items():
+            if field.get('/FT') == '/Btn':
+                states = [state for state in field.get('/_States_', []) if state != '/Off']
+                self.on_states[name] = states[0] if states else '/Yes'
+
+    def fill(self, values):
+        """填写一份表单，返回 PDF 内容"""
+        from pypdf import PdfWriter
+
+        data = {}
+        for field, value in form_data(values).items():
+            if field in self.on_states:
+                data[field] = self.on_states[field] if value else '/Off'
+            else:
+                data[field] = value
+        writer = PdfWriter(clone_from=self.reader)
+        for page in writer.pages:
+            writer.update_page_form_field_values(page, data, auto_regenerate=False)
+        # 由阅读器重新生成外观，与 Adobe 兼容
+        writer.set_need_appearances_writer(True)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+
+def load_template(template_path):
+    """解析后的模板；模板文件被修改（大小或修改时间变化）时重新解析"""
+    path = Path(template_path).resolve()
+    stat = path.stat()
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    cached = _template_cache.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, FormTemplate(path))
+        _template_cache[path] = cached
+    return cached[1]
+
+
+def clean_filename(name):
+    """清理文件名中的无效字符"""
+    if not isinstance(name, str):
+        name = str(name)
+    return re.sub(r'[\\/*?:"<>|]', "", name).strip()
+
+
+def unique_filename(parts, used, fallbacks):
+    """各部分分别清理后用 _ 连接，为空的部分使用对应的 fallback；重名（不分大小写）时加序号"""
+    base = "_".join(clean_filename(part) or fallback for part, fallback in zip(parts, fallbacks))
+    name = base
+    number = 1
+    while name.lower() in used:
+        number += 1
+        name = f"{base}~{number}"
+    used.add(name.lower())
+    return name
+
+
+def form_data(values):
+    """构建填充数据：文本字段使用字符串，复选框使用布尔值"""
+    data = {}
+    for field, key in PDF_FIELD_MAPPING.items():
+        if field in CHECKBOX_VALUES:
+            data[field] = str(values.get(key, "")) == CHECKBOX_VALUES[field]
+        else:
+            data[field] = str(values.get(key, ""))
+    return data
+
+
+def device_values(row, defaults):
+    """processed_df 的一行 -> ValueKEYS 格式的填写内容"""
+    values = dict(defaults)
+    for key, column in (('Asset', 'Asset ID'), ('Hospital', 'Hospital'), ('Location', 'Location')):
+        value = row.get(column)
+        values[key] = "" if value is None or pd.isna(value) else str(value)
+    return values
+
+
+def fill_form(template_path, values):
+    """填写一份表单，返回 PDF 内容"""
+    return load_template(template_path).fill(values)
+
+
+def concat_forms(filled_pdfs, output_path):
+    """合并多份已填写的表单；每份的字段名加上序号后缀，避免同名字段在阅读器中互相联动"""
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, DictionaryObject, NameObject, TextStringObject
+
+    writer = PdfWriter()
+    fields = ArrayObject()
+    seen = set()
+    acroform = None
+    for number, data in enumerate(filled_pdfs, start=1):
+        reader = PdfReader(io.BytesIO(data))
+        form = reader.trailer['/Root'].get('/AcroForm')
+        form = form.get_object() if form is not None else None
+        if form is not None:
+            acroform = acroform or form
+            for field in form.get('/Fields', []):
+                field = field.get_object()
+                field[NameObject('/T')] = TextStringObject(f"{field['/T']}_{number}")
+        for page in reader.pages:
+            added = writer.add_page(page)
+            # 复制后的顶层字段登记到新文件的 /AcroForm
+            for ref in added.get('/Annots', []):
+                while '/Parent' in ref.get_object():
+                    ref = ref.get_object()['/Parent']
+                if '/T' in ref.get_object() and ref.idnum not in seen:
+                    seen.add(ref.idnum)
+                    fields.append(ref)
+
+    if acroform is not None:
+        merged_form = DictionaryObject({
+            NameObject(key): value.clone(writer) for key, value in acroform.items() if key != '/Fields'})
+        merged_form[NameObject('/Fields')] = fields
+        writer._root_object[NameObject('/AcroForm')] = writer._add_object(merged_form)
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+
+
+def fill_task(template_path, jobs):
+    """进程池任务：jobs 为 [(输出文件, [每页的填写内容])]，多页时合并为一个文件"""
+    written = []
+    for output_path, pages in jobs:
+        if len(pages) == 1:
+            Path(output_path).write_bytes(fill_form(template_path, pages[0]))
+        else:
+            concat_forms([fill_form(template_path, values) for values in pages], output_path)
+        written.append(output_path)
+    return written
+
+
+def checklist_jobs(processed_df, output_dir, defaults, per_location):
+    """按设备或按Location生成任务列表（设备按 Model、Asset ID 排序，与分表一致）"""
+    sorted_df = processed_df.sort_values(by=['Model', 'Asset ID'])
+    jobs = []
+    used = set()
+    if per_location:
+        # Location 为空的设备也生成检查表，文件名为 NoLocation_Checklist.pdf
+        for location, group in sorted_df.groupby('Location', sort=True, dropna=False):
+            pages = [device_values(row, defaults) for _, row in group.iterrows()]
+            location = "" if pd.isna(location) else location
+            name = unique_filename([location, "Checklist"], used, ["NoLocation", "Checklist"])
+            jobs.append((output_dir / f"{name}.pdf", pages))
+    else:
+        for _, row in sorted_df.iterrows():
+            values = device_values(row, defaults)
+            name = unique_filename([values['Location'], values['Asset']], used, ["NoLocation", "NoAsset"])
+            jobs.append((output_dir / f"{name}.pdf", [values]))
+    return jobs
+
+
+def generate_checklists(processed_df, template_path, output_dir, defaults=None, mode='asset',
+                        max_workers=1, logger=print, batch_size=20):
+    """为 processed_df 中的每台设备填写检查表
+
+    mode='asset' 每台设备一个 PDF；mode='location' 每个Location合并为一个 PDF。返回生成的文件列表。
+    """
+    values = dict(DEFAULT_VALUES, CheckedDate=date.today().strftime("%d-%b-%Y"))
+    values.update(defaults or {})
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    per_location = mode == 'location'
+    jobs = checklist_jobs(processed_df, output_dir, values, per_location)
+    if not jobs:
+        return []
+    # 每个任务处理一批文件，减少进程间传递次数
+    batch = 1 if per_location else batch_size
+    batches = [jobs[i:i + batch] for i in range(0, len(jobs), batch)]
+    logger(f"生成检查表: {len(jobs)} 个文件")
+
+    written = []
+    if max_workers and max_workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            futures = [executor.submit(fill_task, str(template_path), chunk) for chunk in batches]
+            for future in futures:
+                written.extend(future.result())
+    else:
+        for chunk in batches:
+            written.extend(fill_task(template_path, chunk))
+    logger(f"已生成检查表: {len(written)} 个文件 -> {output_dir}")
+    return written
@@ -0,0 +1,1340 @@
+import copy
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from openpyxl.drawing.image import Image
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+from async_writer import AsyncFileWriter, write_atomic
+from checklist_batch import generate_checklists
+from header_resolver import get_header_resolver
+from location_shards import LocationShards
+from pdf_export import export_pdfs, pdf_path_for
+from pm_rules import PmRuleEngine
+from report_cache import ReportCache, file_sha256
+from run_profile import RunProfile
+from xlsx_patch_writer import PatcherCache, TemplatePatcher, UnsupportedValue, share_duplicate_media
+
+
+def prepare_template(wb):
+    """模板预处理：横向打印，并解除设备区域的合并单元格"""
+    ws = wb.active
+    # 设置打印方向为横向
+    ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
+
+    # 解除设备区域的合并单元格（避免写入错误）
+    merged_ranges = list(ws.merged_cells.ranges)
+    for merged_range in merged_ranges:
+        # 只解除设备数据区域的合并单元格（第8行到第27行）
+        if merged_range.min_row >= 6 and merged_range.min_row <= 25:
+            ws.unmerge_cells(str(merged_range))
+
+
+def copy_template_sheet(wb, template_ws, title):
+    """在同一工作簿内复制模板工作表（样式共用）；补上 copy_worksheet 不复制的图片、页眉页脚、视图和打印区域"""
+    ws = wb.copy_worksheet(template_ws)
+    ws.title = title
+    ws.HeaderFooter = copy.copy(template_ws.HeaderFooter)
+    ws.views = copy.deepcopy(template_ws.views)
+    ws.views.sheetView[0].tabSelected = False
+    if template_ws.print_area:
+        ws.print_area = template_ws.print_area
+    ws.print_title_rows = template_ws.print_title_rows
+    ws.print_title_cols = template_ws.print_title_cols
+    for cf_range, rules in template_ws.conditional_formatting._cf_rules.items():
+        for rule in rules:
+            ws.conditional_formatting.add(cf_range.sqref, copy.copy(rule))
+    for validation in template_ws.data_validations.dataValidation:
+        ws.add_data_validation(copy.copy(validation))
+    for image in template_ws._images:
+        # 每个工作表需要独立的图片对象；_data() 读取后会关闭来源，读完换成新的 BytesIO 以便再次复制
+        data = image._data()
+        image.ref = io.BytesIO(data)
+        new_image = Image(io.BytesIO(data))
+        new_image.width, new_image.height = image.width, image.height
+        new_image.anchor = copy.deepcopy(image.anchor)
+        ws.add_image(new_image)
+    return ws
+
+
+def sheet_title(name, used):
+    """工作表名称：去掉不允许的字符，最长 31 个字符，重名时加序号"""
+    base = re.sub(r'[\\/*?:\[\]]', "", name).strip("' ")[:31] or "Sheet"
+    title = base
+    number = 1
+    while title.lower() in used:
+        number += 1
+        tag = f"~{number}"
+        title = base[:31 - len(tag)] + tag
+    used.add(title.lower())
+    return title
+
+
+class TemplateCache:
+    """模板工作簿缓存：每个模板只解析和预处理一次，之后返回内存中的副本"""
+
+    def __init__(self, prepare=None):
+        self.prepare = prepare
+        self._entries = {}  # 模板路径 -> (mtime, size, 序列化后的工作簿)
+        self._lock = threading.Lock()
+
+    def _load(self, template_path):
+        wb = load_workbook(template_path)
+        if self.prepare:
+            self.prepare(wb)
+        return wb
+
+    def get(self, template_path):
+        """返回模板的独立副本；模板文件被修改后自动重新解析"""
+        path = Path(template_path)
+        stat = path.stat()
+        key = str(path.resolve())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                wb = self._load(path)
+                try:
+                    payload = pickle.dumps(wb, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    # 无法序列化的模板（如含特殊对象）退回每次重新解析
+                    payload = None
+                entry = (stat.st_mtime_ns, stat.st_size, payload)
+                self._entries[key] = entry
+                if payload is None:
+                    return wb
+        if entry[2] is None:
+            return self._load(path)
+        return pickle.loads(entry[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 输出目录中的增量生成记录
+MANIFEST_NAME = ".gepm_manifest.json"
+
+# TotalModel 表头边框
+THIN_SIDE = Side(style='thin')
+
+# 全局模板缓存（同一进程内多次运行共用）
+TEMPLATE_CACHE = TemplateCache(prepare=prepare_template)
+
+# 预先拆分好的模板 XML，分表直接替换单元格后写出
+PATCHER_CACHE = PatcherCache(lambda path: TemplatePatcher(TEMPLATE_CACHE.get(path)))
+
+
+def frame_sha256(df):
+    """DataFrame 内容哈希（含列名，不含索引）"""
+    digest = hashlib.sha256(json.dumps([str(col) for col in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def text_width(value):
+    """单元格文本宽度：多行文本取最长一行，空值为 0"""
+    try:
+        if value is None or pd.isna(value) or not value:
+            return 0
+        return max(len(line) for line in str(value).splitlines())
+    except (TypeError, ValueError):
+        return 0
+
+
+def normalize_asset_ids(values):
+    """Asset ID 统一成比对用的字符串：去空白；纯数字去掉前导零和末尾的 .0（00123 / 123 / 123.0 视为同一台）"""
+    strings = pd.Series(values, dtype=object).map(lambda v: str(v).strip(), na_action='ignore')
+    # 整列为空时 map 结果会推断为 float，.str 需要 object
+    return strings.astype(object).str.replace(r'^0*(\d+?)(?:\.0+)?$', r'\1', regex=True)
+
+
+def parse_bess_assets(text):
+    """解析 bessList：换行或逗号分隔，返回 {规范化ID: 输入的原文}（按输入顺序去重）"""
+    raw_assets = [a.strip() for a in re.split(r"[\n,]+", text) if a.strip()]
+    assets = {}
+    for key, raw in zip(normalize_asset_ids(raw_assets), raw_assets):
+        assets.setdefault(key, raw)
+    return assets
+
+
+def convert_report_cell(cell):
+    """与 pandas openpyxl 读取器相同的单元格转换规则"""
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        if value == cell.value:
+            return value
+        return float(cell.value)
+    return cell.value
+
+
+class ProcessCancelled(Exception):
+    """用户取消处理时抛出，在分表之间检查"""
+
+
+class ExcelProcess:
+    def __init__(self, pm_engineer, pm_phone_number, sample_report_path, output_folder, logger=None, max_workers=1):
+        # 将传入的路径规范为 pathlib.Path（若为空则保留 None）
+        self.output_folder = Path(output_folder) if output_folder else None
+        self.output_dir = None  # 输出目录，为空时使用总表旁的 Output
+        self.sample_report_path = Path(sample_report_path) if sample_report_path else None
+        # self.default_report_path = Path("/Volumes/SSD 1TB/GEhealthcare/Doc/report_demo.xlsx")
+        self.pm_engineer = pm_engineer
+        self.pm_phone_number = pm_phone_number
+        self.logger = logger
+        # 总表读取方式: auto(有 calamine 用 calamine，否则只读流式) / calamine / stream / full
+        self.read_engine = 'auto'
+        # 把解析后的总表缓存到用户缓存目录，总表未变时下次直接读取缓存
+        self.report_cache = True
+        # 低内存模式：分批流式读取总表，设备按Location暂存到磁盘分片，峰值内存取决于最大的Location而不是整个总表
+        self.low_memory = False
+        self.batch_rows = 5000
+        # 合并模式：多个总表（不同医院或重叠的月份）读取后合并，去重后一起分表；为空时只处理 output_folder
+        self.merge_reports = []
+        # 分表写出方式: patch(直接替换模板 XML，遇到特殊值自动改用 openpyxl) / openpyxl
+        self.xlsx_writer = 'patch'
+        # 分表输出方式: files(每个Location每20台一个文件) / hospital(每个医院一个工作簿，分表为其中的工作表) / run(全部分表一个工作簿)
+        self.output_mode = 'files'
+        # 分表文件交给后台线程写出（临时文件 + 原子改名），最多排队 write_queue_size 个文件
+        self.async_write = True
+        self.write_queue_size = 8
+        self.writer = None
+        self.write_errors = []  # [(文件路径, 错误)]，生成结束后统一提示
+        # 并行生成分表的进程数（<=1 时逐个Location串行处理）
+        self.max_workers = max_workers
+        # 增量生成：只重写内容有变化的分表，并删除已不存在的Location分表
+        self.incremental = True
+        self.manifest = {}  # 上次运行的生成记录 {文件名: 记录}
+        self.manifest_entries = {}  # 本次运行的生成记录
+        self.manifest_source = None  # 本次运行的总表（记录在每条生成记录中，同一 Output 目录可有多个总表）
+        self.skipped_files = []
+        self._template_hash = None
+        # 进度回调 progress(已完成Location数, Location总数)
+        self.progress = None
+        self.cancel_event = threading.Event()
+        # 生成分表后用 LibreOffice 批量导出 PDF（PDF 比 xlsx 新的跳过）
+        self.export_pdf = False
+        self.pdf_workers = 2
+        # 检查表模板 (SafetyTest.pdf)；设置后为每台设备填写检查表，asset=每台一个 PDF / location=每个Location一个 PDF
+        self.checklist_template = None
+        self.checklist_mode = 'asset'
+        # 各阶段耗时和计数；write_profile 为 True 时另存 JSON 到 Output 目录
+        self.profile = RunProfile()
+        self.write_profile = False
+
+        # On Hold / BESS 选项（由 UI 在启动前写入，处理线程不直接读取控件）
+        self.on_hold_enabled = False
+        self.bess_enabled = False
+        self.bess_text = ""
+        self.bess_unmatched = []  # 总表中找不到的 BESS Asset（输入原文）
+        self.bess_matched = set()  # 总表中找到的 BESS Asset（规范化后）
+
+        # PM规则配置: key为关键字, value为偏移(月数)
+        self.pm_rules = {
+            "DEFIBRILLATOR": 6,  # 加6个月
+            # 可以在此添加其他规则
+        }
+        self.default_pm_offset = 12  # 默认加12个月
+        # PM规则文件 (JSON，格式见 pm_rules.py)；设置后代替 pm_rules，可按厂家、型号、Description 和医院指定偏移
+        self.pm_rule_file = None
+        self._pm_engine = None
+
+        # demo report 對應需填充的设备数据
+        self.col_map = {
+            'Asset ID': 2,
+            'Location': 3,
+            'Remark': 4,
+            'Manufacture': 5,
+            'Model': 6,
+            'Serial No': 7,
+            'Description': 8,
+            'ZT': 9,
+            'HA Work Order No': 10,
+            'Service Report Reference': 14,
+        }
+
+        # 新增：動態標題匹配，不再使用固定列字母
+        # key = 需要的目標欄位名稱, value = 可接受的表頭關鍵字（忽略大小寫）
+        self.dynamic_header_rules = {
+            'Asset ID': ['asset id'],
+            'Hospital': ['hospital'],
+            'Location': ['location'],
+            'Manufacture': ['manufacture'],
+            'Model': ['model'],
+            'Serial No': ['serial no'],
+            'Description': ['description'],
+            'ZT': ['zt'],
+            'HA Work Order No': ['ha work order no'],
+            'Schedule Date': ['schedule date'],
+            'Service Report Reference': ['service report reference'],
+            'Caller': ['caller'],
+            'Caller Tel': ['caller tel'],
+            'Status': ['^status$'] #只接受完全等於「Status」
+        }
+        # 原始总表表头的匹配结果（读取时记录，用于提示缺失或重复的栏位）
+        self.header_resolution = None
+        self.report_header = None  # 原始总表表头
+
+    def cancel(self):
+        """请求取消处理，在下一个分表开始前生效"""
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise ProcessCancelled()
+
+    def report_progress(self, done, total):
+        if self.progress:
+            self.progress(done, total)
+
+    def log(self, message: str):
+        if self.logger:
+            self.logger(message)
+        else:
+            print(message)
+
+    @staticmethod
+    def clean_filename(name):
+        if not isinstance(name, str):
+            name = str(name)
+        # 移除特殊字符，只保留字母、数字、中文、下划线和短横线
+        return re.sub(r'[\\/*?:"<>|]', "", name).strip()
+
+    def total_model(self, processed_df, output_path, counts=None):
+        with self.profile.stage('total_model'):
+            return self._total_model(processed_df, output_path, counts)
+
+    @staticmethod
+    def model_counts(processed_df):
+        """(Manufacture, Model, Description) 的设备数；低内存模式逐批计算后用 add 累加"""
+        return processed_df.groupby(['Manufacture', 'Model', 'Description']).size()
+
+    @staticmethod
+    def add_model_counts(counts, batch_counts):
+        """累加逐批的设备数；Model 可能数字和文字混合，用 groupby 合并而不是按索引对齐相加"""
+        if counts is None:
+            return batch_counts
+        return pd.concat([counts, batch_counts]).groupby(level=[0, 1, 2], sort=False).sum()
+
+    def _total_model(self, processed_df, output_path, counts=None):
+        if counts is None:
+            counts = self.model_counts(processed_df)
+        model_stats = (
+            counts
+            .astype('int64')
+            .reset_index(name='Count')
+            .sort_values(by=['Description', 'Manufacture', 'Count'], ascending=[True, True, False])
+        )
+        path = output_path
+        total_model_path = path / "TotalModel.xlsx"
+
+        try:
+            total_count = sum(model_stats['Count'])
+            header = list(model_stats.columns)
+            total_row = ["", "", "Total", total_count]
+
+            # 自动调整列宽：按聚合结果的字符串长度计算（写入前完成，单次写出）
+            widths = []
+            for idx, column in enumerate(header):
+                values = [column, total_row[idx], *pd.unique(model_stats[column])]
+                max_length = max((text_width(value) for value in values), default=0)
+                widths.append(int(max_length * 1.2) + 6)
+
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Sheet1")
+            for idx, width in enumerate(widths, start=1):
+                ws.column_dimensions[get_column_letter(idx)].width = width
+
+            # 表头样式沿用 pandas 2.x DataFrame.to_excel 的默认样式（粗体、细边框、居中）
+            header_cells = []
+            for name in header:
+                cell = WriteOnlyCell(ws, value=name)
+                cell.font = Font(bold=True)
+                cell.border = Border(left=THIN_SIDE, right=THIN_SIDE, top=THIN_SIDE, bottom=THIN_SIDE)
+                cell.alignment = Alignment(horizontal='center', vertical='top')
+                header_cells.append(cell)
+            ws.append(header_cells)
+
+            for row in model_stats.itertuples(index=False, name=None):
+                ws.append([None if pd.isna(value) else value for value in row])
+            # 添加总数量行
+            ws.append(total_row)
+
+            wb.save(total_model_path)
+            self.profile.count('bytes_saved', os.path.getsize(total_model_path))
+            self.logger(f"已创建模型统计文件: {total_model_path}")
+
+        except Exception as e:
+            self.logger(f"生成模型统计文件失败: {e}")
+
+        return 1
+
+    def location_chunks(self, location_df, location, chunk_size=20):
+        """按Model和Asset ID排序后每 chunk_size 台分为一份，返回 [(分表名称, chunk_df)]"""
+        # 清理Location名称用于文件名
+        clean_loc = self.clean_filename(location)
+        if not clean_loc:
+            self.logger(f"无效的Location名称: {location}")
+            return []
+
+        # 直接调用时补算计划日期和PM到期日
+        if '__schedule_label' not in location_df.columns:
+            location_df = self.add_pm_dates(location_df)
+
+        # 按Model和Asset ID排序
+        sorted_df = location_df.sort_values(
+            by=['Model', 'Asset ID'],
+            ascending=[True, True]
+        ).reset_index(drop=True)
+
+        # 计算需要分成几个文件
+        num_chunks = (len(sorted_df) + chunk_size - 1) // chunk_size
+
+        chunks = []
+        for i in range(num_chunks):
+            # 分块处理数据
+            start_idx = i * chunk_size
+            end_idx = min((i + 1) * chunk_size, len(sorted_df))
+            suffix = f"({chr(65 + i)})" if i > 0 else ""  # A, B, C...
+            chunks.append((f"{clean_loc}{suffix}", sorted_df.iloc[start_idx:end_idx].copy()))
+        return chunks
+
+    def generate_location_files(self, location_df, location, output_dir, template_path, chunk_size=20):
+        """为特定Location生成分表文件"""
+        for name, chunk_df in self.location_chunks(location_df, location, chunk_size):
+            # 每个分表开始前检查是否已请求取消
+            self.check_cancelled()
+            self.profile.count('chunks')
+
+            # 生成文件名
+            filename = f"{name}.xlsx"
+            output_path = output_dir / filename
+
+            # 增量生成：数据、模板和工程师信息都没变且文件未被改动时跳过
+            with self.profile.stage('manifest_hash'):
+                entry = self.manifest_entry(chunk_df, template_path)
+                unchanged = self.is_unchanged(filename, output_path, entry)
+            if unchanged:
+                self.manifest_entries[filename] = self.manifest[filename]
+                self.skipped_files.append(filename)
+                self.profile.count('chunks_skipped')
+                self.logger(f"未变化，跳过分表: {output_path}")
+                continue
+
+            # 模板已预先拆好时直接替换单元格 XML，否则从模板缓存获取已预处理的工作簿副本
+            with self.profile.stage('template_load'):
+                patcher = PATCHER_CACHE.get(template_path) if self.xlsx_writer == 'patch' else None
+                wb = None if patcher else TEMPLATE_CACHE.get(template_path)
+                hospital_prefix = patcher.value(4, 2) if patcher else wb.active.cell(row=4, column=2).value
+
+            with self.profile.stage('cell_writes'):
+                cells = self.chunk_cells(chunk_df, hospital_prefix)
+            self.profile.count('cells_written', len(cells))
+
+            # 生成文件内容（写入磁盘由 save_output 完成）
+            with self.profile.stage('workbook_save'):
+                if patcher:
+                    try:
+                        data = patcher.render(cells)
+                    except UnsupportedValue:
+                        # 含公式、日期等特殊值的分表改用 openpyxl 写出
+                        self.profile.count('openpyxl_fallbacks')
+                        wb = TEMPLATE_CACHE.get(template_path)
+                if wb is not None:
+                    ws = wb.active
+                    for (excel_row, col), value in cells.items():
+                        ws.cell(row=excel_row, column=col).value = value
+                    buffer = io.BytesIO()
+                    wb.save(buffer)
+                    data = buffer.getvalue()
+            self.save_output(output_path, data, entry, "分表")
+
+    def save_output(self, output_path, data, entry, kind):
+        """写出文件，成功后记录生成记录；启用后台写入时排队写出，失败的文件不记录，结束后统一提示"""
+        def written(path):
+            self.logger(f"已创建{kind}: {path}")
+            stamp = file_stamp(path)
+            self.profile.count('bytes_saved', stamp['size'])
+            self.manifest_entries[path.name] = dict(entry, **stamp)
+
+        if self.writer is not None:
+            self.writer.submit(output_path, data, written)
+            return
+        with self.profile.stage('file_write'):
+            write_atomic(output_path, data)
+        written(output_path)
+
+    @contextmanager
+    def output_writer(self):
+        """生成分表期间启用后台写入线程，退出时等待全部文件写完并收集写入错误"""
+        if not self.async_write:
+            yield
+            return
+        self.writer = AsyncFileWriter(self.write_queue_size, profile=self.profile)
+        try:
+            yield
+        finally:
+            self.write_errors.extend(self.writer.close())
+            self.writer = None
+
+    def report_write_errors(self):
+        for path, error in self.write_errors:
+            self.logger(f"写入失败: {Path(path).name}: {error}")
+        if self.write_errors:
+            self.logger(f"警告: {len(self.write_errors)} 个文件写入失败，下次运行会重新生成")
+
+    def workbook_groups(self, grouped, report_path):
+        """按医院（output_mode='hospital'）或整次运行归并Location分组，返回 {工作簿文件名: [(location, group)]}"""
+        books = {}
+        for location, group in grouped:
+            if self.output_mode == 'hospital':
+                hospitals = group['Hospital'].dropna() if 'Hospital' in group.columns else ()
+                name = self.clean_filename(hospitals.iloc[0]) if len(hospitals) else ""
+                name = name or "NoHospital"
+            else:
+                name = f"{Path(report_path).stem}_PM"
+            books.setdefault(f"{name}.xlsx", []).append((location, group))
+        return books
+
+    def generate_workbooks(self, grouped, output_dir, template_path, report_path):
+        """多工作表输出：每个工作簿从一份模板开始，分表在内存中复制模板工作表，整本只保存一次"""
+        books = self.workbook_groups(grouped, report_path)
+        self.logger(f"输出为 {len(books)} 个工作簿")
+        for done, (filename, locations) in enumerate(books.items(), start=1):
+            self.check_cancelled()
+            chunks = [chunk for location, group in locations for chunk in self.location_chunks(group, location)]
+            self.logger(f"生成工作簿: {filename}, Location数: {len(locations)}, 工作表数: {len(chunks)}")
+            self.generate_workbook(chunks, output_dir / filename, template_path)
+            self.report_progress(done, len(books))
+
+    def generate_workbook(self, chunks, output_path, template_path):
+        filename = output_path.name
+        with self.profile.stage('manifest_hash'):
+            # 各分表内容和顺序都相同才视为未变化
+            digest = hashlib.sha256()
+            for name, chunk_df in chunks:
+                digest.update(f"{name}\0{frame_sha256(chunk_df)}\0".encode())
+            entry = dict(self.manifest_entry(chunks[0][1], template_path), rows=digest.hexdigest())
+            unchanged = self.is_unchanged(filename, output_path, entry)
+        if unchanged:
+            self.manifest_entries[filename] = self.manifest[filename]
+            self.skipped_files.append(filename)
+            self.profile.count('chunks_skipped', len(chunks))
+            self.logger(f"未变化，跳过工作簿: {output_path}")
+            return
+
+        with self.profile.stage('template_load'):
+            wb = TEMPLATE_CACHE.get(template_path)
+            template_ws = wb.active
+            hospital_prefix = template_ws.cell(row=4, column=2).value
+
+        titles = set()
+        for name, chunk_df in chunks:
+            # 每个分表开始前检查是否已请求取消
+            self.check_cancelled()
+            self.profile.count('chunks')
+            with self.profile.stage('sheet_copy'):
+                ws = copy_template_sheet(wb, template_ws, sheet_title(name, titles))
+            with self.profile.stage('cell_writes'):
+                cells = self.chunk_cells(chunk_df, hospital_prefix)
+                for (excel_row, col), value in cells.items():
+                    ws.cell(row=excel_row, column=col).value = value
+            self.profile.count('cells_written', len(cells))
+
+        # 去掉作为复制来源的模板工作表
+        wb.remove(template_ws)
+        wb.active = 0
+        wb.worksheets[0].views.sheetView[0].tabSelected = True
+        with self.profile.stage('workbook_save'):
+            buffer = io.BytesIO()
+            wb.save(buffer)
+            data = buffer.getvalue()
+            if template_ws._images:
+                data = share_duplicate_media(data)
+        self.save_output(output_path, data, entry, "工作簿")
+
+    def chunk_cells(self, chunk_df, hospital_prefix=None):
+        """计算一个分表需要写入的单元格 {(行, 列): 值}"""
+        cells = {}
+        for local_idx, (_, row) in enumerate(chunk_df.iterrows()):
+            excel_row = local_idx + 6  # local_idx 是每个 chunk 内的行号，从 0 开始
+
+            # 确保行在有效范围内（8-27）
+            if excel_row > 25:
+                self.logger(f"警告: 行号 {excel_row} 超出模板范围，跳过")
+                continue
+
+            for field, col in self.col_map.items():
+                value = row.get(field)
+                if pd.notna(value):
+                    cells[excel_row, col] = value
+
+            # 设置计划日期 (L列) 和 PM到期日 (K列)，已由 add_pm_dates 批量计算
+            schedule_label = row.get('__schedule_label')
+            if pd.notna(schedule_label):
+                cells[excel_row, 12] = schedule_label
+                pm_due_label = row.get('__pm_due_label')
+                if pd.notna(pm_due_label):
+                    cells[excel_row, 11] = pm_due_label
+
+        # 设置联系人信息（使用第一条记录的信息）
+        if not chunk_df.empty:
+            first_row = chunk_df.iloc[0]
+            # 设置医院信息（将Hospital内容添加到B4原本文本的末尾）
+            if pd.notna(first_row.get('Hospital')):
+                cells[4, 2] = f"{hospital_prefix or ''}{first_row['Hospital']}"
+            if pd.notna(first_row.get('Caller')):
+                cells[28, 5] = first_row['Caller']  # E30
+            if pd.notna(first_row.get('Caller Tel')):
+                cells[28, 7] = first_row['Caller Tel']  # G30
+            if self.pm_engineer:
+                cells[27, 5] = self.pm_engineer  # E27
+            if self.pm_phone_number:
+                cells[27, 7] = self.pm_phone_number  # G27
+        return cells
+
+    def template_hash(self, template_path):
+        """模板文件内容和列映射的哈希，任一变化都需要重新生成全部分表"""
+        if self._template_hash is None:
+            digest = hashlib.sha256(file_sha256(template_path).encode())
+            digest.update(json.dumps(self.col_map, sort_keys=True).encode())
+            self._template_hash = digest.hexdigest()
+        return self._template_hash
+
+    def manifest_entry(self, chunk_df, template_path):
+        return {
+            'rows': frame_sha256(chunk_df),
+            'template': self.template_hash(template_path),
+            'engineer': self.pm_engineer,
+            'phone': self.pm_phone_number,
+            'report': self.manifest_source,
+        }
+
+    def is_unchanged(self, filename, output_path, entry):
+        if not self.incremental:
+            return False
+        previous = self.manifest.get(filename)
+        if not previous or any(previous.get(key) != value for key, value in entry.items()):
+            return False
+        # 输出文件被删除或手动修改过也需要重新生成
+        return output_path.exists() and file_stamp(output_path) == {
+            'size': previous.get('size'), 'mtime_ns': previous.get('mtime_ns')}
+
+    def load_manifest(self, output_dir):
+        manifest_path = output_dir / MANIFEST_NAME
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, output_dir, entries):
+        manifest_path = output_dir / MANIFEST_NAME
+        try:
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 2, 'files': entries}, f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            self.logger(f"保存生成记录失败: {e}")
+
+    def source_key(self, file_path):
+        """生成记录中的总表标识：总表的绝对路径，合并模式为全部总表"""
+        paths = self.merge_reports or [file_path]
+        return " | ".join(sorted(str(Path(path).resolve()) for path in paths))
+
+    def own_stale_entries(self):
+        """本总表上次生成、本次已不再生成的文件（其他总表的记录不算）"""
+        return sorted(name for name, entry in self.manifest.items()
+                      if name not in self.manifest_entries and entry.get('report') == self.manifest_source)
+
+    def merged_manifest(self):
+        """保存的生成记录：本次的记录加上同目录其他总表的记录（旧版本没有 report 的记录也保留）"""
+        stale = set(self.own_stale_entries())
+        kept = {name: entry for name, entry in self.manifest.items() if name not in stale}
+        return {**kept, **self.manifest_entries}
+
+    def remove_stale_files(self, output_dir):
+        """删除本总表上次生成、但本次已不存在的Location分表；同一目录中其他总表的分表不受影响"""
+        for filename in self.own_stale_entries():
+            # 只处理清单中记录的、位于输出目录内的文件
+            if Path(filename).name != filename:
+                continue
+            stale_path = output_dir / filename
+            if stale_path.exists():
+                stale_path.unlink()
+                self.logger(f"已删除过期分表: {filename}")
+            # 同名导出的 PDF 一并删除
+            stale_pdf = pdf_path_for(stale_path)
+            if stale_pdf.exists():
+                stale_pdf.unlink()
+
+    def pm_rule_engine(self):
+        """编译PM规则（每次运行编译一次）"""
+        if self._pm_engine is None:
+            if self.pm_rule_file:
+                self._pm_engine = PmRuleEngine.from_file(self.pm_rule_file, self.default_pm_offset)
+            else:
+                self._pm_engine = PmRuleEngine.from_keywords(self.pm_rules, self.default_pm_offset)
+        return self._pm_engine
+
+    def add_pm_dates(self, processed_df):
+        """整表计算计划日期 (L列) 和 PM到期日 (K列) 的显示文本，__pm_rule 记录生效的PM规则"""
+        # 每行的PM偏移月数和生效的规则名（未命中任何规则为 None，使用默认偏移）
+        offsets, rule_names = self.pm_rule_engine().apply(processed_df)
+        schedule_labels = pd.Series(np.nan, index=processed_df.index, dtype=object)
+        pm_due_labels = pd.Series(np.nan, index=processed_df.index, dtype=object)
+        if 'Schedule Date' in processed_df.columns and not processed_df.empty:
+            schedule = processed_df['Schedule Date']
+            if pd.api.types.is_datetime64_any_dtype(schedule):
+                dates = schedule
+            else:
+                dates = pd.to_datetime(schedule, errors='coerce', format='mixed')
+
+            # 有值但无法解析的日期只汇总提示一次（数量和前几个值）
+            invalid = schedule[schedule.notna() & dates.isna()]
+            if len(invalid):
+                examples = ", ".join(str(value) for value in invalid.head(5))
+                self.logger(f"警告: {len(invalid)} 个 Schedule Date 日期格式错误，例如: {examples}")
+
+            valid = dates.notna()
+            pm_due = pd.Series(pd.NaT, index=processed_df.index, dtype=dates.dtype)
+            for months in pd.unique(offsets[valid]):
+                mask = valid & (offsets == months)
+                pm_due[mask] = dates[mask] + pd.DateOffset(months=int(months))
+
+            schedule_labels[valid] = "    " + dates[valid].dt.strftime("%b-%Y")
+            due_valid = pm_due.notna()
+            pm_due_labels[due_valid] = pm_due[due_valid].dt.strftime("%b-%Y")
+
+        return processed_df.assign(__schedule_label=schedule_labels, __pm_due_label=pm_due_labels,
+                                   __pm_rule=rule_names)
+
+    def resolve_header(self, columns):
+        """匹配总表表头并记录结果，缺失或有多个匹配的栏位在读取数据前立即提示"""
+        self.report_header = list(columns)
+        self.header_resolution = get_header_resolver(self.dynamic_header_rules).resolve(columns)
+        for message in self.header_resolution.messages():
+            self.logger(message)
+        return self.header_resolution.columns
+
+    def resolve_columns(self, columns):
+        """按 dynamic_header_rules 為每個目標欄位找到第一個匹配的表頭（同樣的表頭只匹配一次）"""
+        return get_header_resolver(self.dynamic_header_rules).resolve(columns).columns
+
+    def read_report_cached(self, file_path):
+        """有未过期的缓存时直接读取，否则解析总表并写入缓存（缓存读写失败不影响处理）"""
+        if not self.report_cache:
+            return self.read_report(file_path)
+        cache = ReportCache(file_path, {'rules': self.dynamic_header_rules, 'engine': self.read_engine})
+        try:
+            cached = cache.load()
+        except OSError:
+            cached = None
+        if cached is not None:
+            df, header = cached
+            self.resolve_header(header)
+            self.profile.count('report_cache_hits')
+            self.logger(f"使用总表缓存 ({cache.format})")
+            return df
+
+        df = self.read_report(file_path)
+        try:
+            with self.profile.stage('report_cache_save'):
+                cache.save(df, self.report_header or list(df.columns))
+        except Exception as e:
+            self.logger(f"警告: 保存总表缓存失败: {e}")
+        return df
+
+    def read_target_columns(self, file_path):
+        """读取总表并把匹配到的表头改名为目标栏位名，供合并模式拼接不同写法的表头"""
+        df = self.read_report_cached(file_path)
+        resolved = {target: col for target, col in self.resolve_columns(df.columns).items() if col is not None}
+        df = df.loc[:, list(resolved.values())]
+        df.columns = list(resolved)
+        return df
+
+    def reader_settings(self):
+        return {
+            'read_engine': self.read_engine,
+            'report_cache': self.report_cache,
+            'dynamic_header_rules': self.dynamic_header_rules,
+        }
+
+    def read_merged_reports(self, report_paths):
+        """并行读取多个总表并按目标栏位合并（max_workers > 1 时用进程池），日志按输入顺序输出"""
+        settings = self.reader_settings()
+        workers = min(self.max_workers or 1, len(report_paths))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(read_report_task, [settings] * len(report_paths), report_paths))
+        else:
+            results = [read_report_task(settings, path) for path in report_paths]
+
+        frames = []
+        for path, (df, messages, profile) in zip(report_paths, results):
+            self.logger(f"已读取总表: {Path(path).name}, {len(df)} 行")
+            for message in messages:
+                self.logger(f"  {message}")
+            self.profile.merge(profile)
+            frames.append(df)
+        merged = pd.concat(frames, ignore_index=True)
+        return self.drop_duplicate_tasks(merged)
+
+    def drop_duplicate_tasks(self, df):
+        """按 Asset ID + HA Work Order No 去重，重复时保留后面总表中的记录（较新的导出）；任一栏位为空的行不去重"""
+        keys = ['Asset ID', 'HA Work Order No']
+        if any(key not in df.columns for key in keys):
+            self.logger("警告: 缺少 Asset ID 或 HA Work Order No 栏位，合并时不去重")
+            return df
+        # 与 BESS 比对相同的规范化：00123、123 和 123.0 视为同一编号
+        key_df = pd.DataFrame({key: normalize_asset_ids(df[key].to_numpy(dtype=object)) for key in keys})
+        complete = (key_df.notna() & (key_df != "")).all(axis=1)
+        duplicated = key_df.duplicated(keep='last') & complete
+        dropped = int(duplicated.sum())
+        self.profile.count('duplicates_dropped', dropped)
+        self.logger(f"合并后共 {len(df)} 行, 去除重复工单 {dropped} 行")
+        return df[~duplicated.to_numpy()].reset_index(drop=True)
+
+    def read_report(self, file_path):
+        """读取总表，只保留表头匹配到的列；可用 calamine 时优先使用"""
+        engine = self.read_engine
+        if engine == 'auto':
+            if importlib.util.find_spec('python_calamine'):
+                try:
+                    return self.read_report_calamine(file_path)
+                except ValueError:
+                    # 旧版 pandas 不支持 calamine 引擎
+                    pass
+            engine = 'stream'
+
+        if engine == 'full':
+            df = pd.read_excel(file_path, engine='openpyxl')
+            self.resolve_header(df.columns)
+            return df
+        if engine == 'calamine':
+            return self.read_report_calamine(file_path)
+        return self.read_report_stream(file_path)
+
+    def read_report_calamine(self, file_path):
+        """calamine 引擎：先只读表头，再按列名读取所需列"""
+        header = pd.read_excel(file_path, engine='calamine', nrows=0).columns
+        needed = [col for col in self.resolve_header(header).values() if col is not None]
+        return pd.read_excel(file_path, engine='calamine', usecols=list(dict.fromkeys(needed)))
+
+    def read_report_stream(self, file_path):
+        """只读模式逐行读取总表：先读表头确定所需列，再只转换这些列的单元格"""
+        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            ws = wb.worksheets[0]
+            ws.reset_dimensions()
+            rows = ws.iter_rows()
+            header, indices = self.stream_header(rows)
+
+            data = [[header[i] for i in indices]]
+            last_row_with_data = 0
+            for row in rows:
+                values = [convert_report_cell(row[i]) if i < len(row) else "" for i in indices]
+                if any(value != "" for value in values):
+                    last_row_with_data = len(data)
+                data.append(values)
+        finally:
+            wb.close()
+
+        # 去掉末尾的空行，交给 pandas 做与 read_excel 相同的型別推斷
+        data = data[:last_row_with_data + 1]
+        return TextParser(data, header=0).read()
+
+    def stream_header(self, rows):
+        """读取表头行并匹配，返回 (表头, 需要读取的列位置)"""
+        header = [convert_report_cell(cell) for cell in next(rows, ())]
+        # 与 pd.read_excel 一致：去掉表头末尾的空单元格
+        while header and header[-1] == "":
+            header.pop()
+        labels = [value if value != "" else None for value in header]
+        resolved = self.resolve_header(labels)
+        indices = sorted({labels.index(col) for col in resolved.values() if col is not None})
+        return header, indices
+
+    def iter_report_batches(self, file_path, batch_rows):
+        """低内存模式：只读模式逐行读取，每 batch_rows 行生成一个 DataFrame（型別按批推斷，空行直接丢弃）"""
+        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            ws = wb.worksheets[0]
+            ws.reset_dimensions()
+            rows = ws.iter_rows()
+            header, indices = self.stream_header(rows)
+            names = [header[i] for i in indices]
+            batch = []
+            for row in rows:
+                values = [convert_report_cell(row[i]) if i < len(row) else "" for i in indices]
+                if any(value != "" for value in values):
+                    batch.append(values)
+                if len(batch) >= batch_rows:
+                    yield TextParser([names] + batch, header=0).read()
+                    batch = []
+            if batch:
+                yield TextParser([names] + batch, header=0).read()
+        finally:
+            wb.close()
+
+    @staticmethod
+    def cast_id_column(values):
+        """Asset ID / HA Work Order No 轉整數，無法轉換的保持原樣，空值為 None"""
+        if values.dtype.kind in "iu":
+            return values.astype(object)
+        if values.dtype.kind == "f":
+            missing = np.isnan(values)
+            finite = np.isfinite(values)
+            result = values.astype(object)
+            result[finite] = np.trunc(values[finite]).astype(np.int64).astype(object)
+            result[missing] = None
+            return result
+
+        def cast(value):
+            try:
+                # 尝试转换为整数，如果失败则保持原样
+                return int(value) if pd.notna(value) else None
+            except:
+                return value
+
+        return np.array([cast(value) for value in values], dtype=object)
+
+    def extract_rows(self, df, resolved_columns, bess_assets):
+        """按列篩選 Accepted / On Hold / BESS 設備並轉換欄位型別"""
+        targets = [key for key, col in resolved_columns.items() if col is not None]
+        # 與 iterrows 取得的值一致：逐列轉為 object 陣列
+        columns = {
+            key: df[resolved_columns[key]].to_numpy(dtype=object)
+            for key in targets
+        }
+        for key in ('Asset ID', 'HA Work Order No'):
+            if key in columns:
+                columns[key] = self.cast_id_column(df[resolved_columns[key]].to_numpy())
+
+        num_rows = len(df)
+        missing = np.full(num_rows, None, dtype=object)
+        status_values = columns.get('Status', missing)
+        location_values = pd.Series(columns.get('Location', missing), dtype=object)
+        asset_values = pd.Series(columns.get('Asset ID', missing), dtype=object)
+
+        # Location非空且非空字符串
+        has_location = (location_values.notna() & (location_values.astype(str).str.strip() != "")).to_numpy()
+
+        # BESS 特殊處理（優先於 Accepted/OnHold），bess_assets 的鍵為規範化後的 Asset ID
+        self.bess_unmatched = []
+        self.bess_matched = set()
+        if bess_assets:
+            asset_ids = normalize_asset_ids(asset_values).fillna("")
+            is_bess = asset_ids.isin(set(bess_assets)).to_numpy()
+            self.bess_matched = set(asset_ids[is_bess])
+            self.bess_unmatched = [bess_assets[key] for key in bess_assets if key not in self.bess_matched]
+        else:
+            is_bess = np.zeros(num_rows, dtype=bool)
+        is_accepted = ~is_bess & (status_values == 'Accepted') & has_location
+        include_on_hold = self.on_hold_enabled
+        is_on_hold = ~is_bess & ~is_accepted & (status_values == 'On Hold') & has_location & include_on_hold
+
+        keep = is_bess | is_accepted | is_on_hold
+        status_group = np.select([is_bess, is_accepted, is_on_hold], ['BESS', 'Accepted', 'On Hold'], default="")
+        data = {key: values[keep] for key, values in columns.items()}
+        data['__status_group'] = status_group[keep].astype(object)
+        # BESS 和 On Hold 设备写 Remark
+        has_remark = is_bess[keep] | is_on_hold[keep]
+        if has_remark.any():
+            data['Remark'] = np.where(has_remark, data['__status_group'], np.nan).astype(object)
+
+        # 与逐行构建 DataFrame 相同的型別推斷
+        rows = np.column_stack(list(data.values())).tolist() if keep.any() else []
+        return pd.DataFrame(rows, columns=list(data.keys()))
+
+    def worker_settings(self):
+        """子进程重建 ExcelProcess 所需的纯数据配置（UI 控件和 logger 不可跨进程传递）"""
+        return {
+            'pm_engineer': self.pm_engineer,
+            'pm_phone_number': self.pm_phone_number,
+            'pm_rules': self.pm_rules,
+            'default_pm_offset': self.default_pm_offset,
+            'pm_rule_file': self.pm_rule_file,
+            'col_map': self.col_map,
+            'incremental': self.incremental,
+            'manifest': self.manifest,
+            'manifest_source': self.manifest_source,
+            'xlsx_writer': self.xlsx_writer,
+            'async_write': self.async_write,
+        }
+
+    def generate_locations_parallel(self, grouped, output_dir, template_path):
+        """用进程池并行生成各Location分表，日志按Location顺序输出"""
+        workers = min(self.max_workers, len(grouped))
+        self.logger(f"并行生成分表: {workers} 个进程")
+        settings = self.worker_settings()
+        # 子进程共用的取消标记，子进程在每个分表开始前检查
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_generate_worker,
+                                 initargs=(stop,)) as executor:
+            try:
+                futures = []
+                for location, group in grouped:
+                    self.check_cancelled()
+                    futures.append((location, len(group), executor.submit(
+                        generate_location_task, settings, group, location, output_dir, template_path)))
+                # 按提交顺序取结果，保证日志顺序与串行模式一致
+                for done, (location, count, future) in enumerate(futures, start=1):
+                    # 等待期间也检查取消，不必等当前Location的全部分表完成
+                    while not wait([future], timeout=0.2).done:
+                        self.check_cancelled()
+                    self.check_cancelled()
+                    self.logger(f"处理Location: {location}, 设备数: {count}")
+                    messages, entries, skipped, profile, errors = future.result()
+                    for message in messages:
+                        self.logger(message)
+                    self.manifest_entries.update(entries)
+                    self.skipped_files.extend(skipped)
+                    self.write_errors.extend(errors)
+                    # 子进程各阶段耗时累加（为各进程耗时之和，不是墙钟时间）
+                    self.profile.merge(profile)
+                    self.report_progress(done, len(futures))
+            except ProcessCancelled:
+                # 取消尚未开始的任务，运行中的子进程在下一个分表开始前停止
+                stop.set()
+                executor.shutdown(cancel_futures=True)
+                raise
+
+    def preprocess(self):
+        """主处理函数"""
+        self.profile = RunProfile()
+        # 获取模板文件路径
+        template_path = self.sample_report_path
+        if not template_path or not Path(template_path).exists():
+            self.logger("错误: 模板文件未找到")
+            return 0
+
+        file_path = self.output_folder
+        # 获取当前文件的目录
+        output_dir = Path(self.output_dir) if self.output_dir else Path(file_path).parent / "Output"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.logger(f"输出目录: {output_dir}")
+
+        if self.low_memory:
+            if self.merge_reports:
+                self.logger("警告: 合并模式不支持低内存模式，按普通模式处理")
+            else:
+                return self.preprocess_low_memory(file_path, output_dir, template_path)
+
+        try:
+            self.header_resolution = None
+            self.report_header = None
+            if self.merge_reports:
+                self.logger(f"正在合并读取 {len(self.merge_reports)} 个总表文件")
+                # 各总表的表头已改名为目标栏位名
+                with self.profile.stage('read_report'):
+                    df = self.read_merged_reports(self.merge_reports)
+            else:
+                self.logger(f"正在读取总表文件: {file_path}")
+                # 读取Excel文件（只读取 dynamic_header_rules 用到的列）
+                with self.profile.stage('read_report'):
+                    df = self.read_report_cached(file_path)
+            self.profile.count('input_rows', len(df))
+
+        except Exception as e:
+            self.logger(f"读取文件失败: {e}")
+            return 0
+
+        if self.merge_reports:
+            resolved_columns = {target: target if target in df.columns else None
+                                for target in self.dynamic_header_rules}
+        else:
+            # 動態搜尋表頭欄位
+            with self.profile.stage('resolve_columns'):
+                resolved_columns = self.resolve_columns(df.columns)
+            # self.log(f"動態匹配到的欄位: {resolved_columns}")
+            # 表头的提示已在读取时输出
+            if self.header_resolution is None:
+                self.resolve_header(df.columns)
+        
+        # 解析 bessList
+        bess_assets = {}
+        if self.bess_enabled:
+            # 去重並保持輸入順序（00123 和 123 視為同一台）
+            bess_assets = parse_bess_assets(self.bess_text)
+            self.logger(f"BESS 跟機共: {len(bess_assets)}台")
+            
+        # 按列批量篩選和轉型，生成處理後的DataFrame
+        with self.profile.stage('extract_rows'):
+            processed_df = self.extract_rows(df, resolved_columns, bess_assets)
+        self.profile.count('processed_rows', len(processed_df))
+        if self.bess_unmatched:
+            self.logger(f"警告: 以下 {len(self.bess_unmatched)} 台 BESS Asset 在总表中找不到: "
+                        f"{', '.join(self.bess_unmatched)}")
+        self.logger(f"成功读取文件: 本月共有「 {len(processed_df)} 」部機器")
+
+        if processed_df.empty:
+            self.logger("警告: 没有找到有效的Location数据")
+            return 0
+
+        # 整表一次性计算计划日期和PM到期日
+        self._pm_engine = None
+        try:
+            self.pm_rule_engine()
+        except ValueError as e:
+            # PM规则文件无法读取或规则无效
+            self.logger(f"错误: {e}")
+            return 0
+        with self.profile.stage('add_pm_dates'):
+            processed_df = self.add_pm_dates(processed_df)
+        for line in PmRuleEngine.summary_lines(processed_df['__pm_rule']):
+            self.logger(line)
+
+        # 按Location分组处理（On Hold 和 BESS 设备Location独立分组）
+        with self.profile.stage('groupby'):
+            grouped = processed_df.groupby(self.group_keys(processed_df))
+        return self.generate_outputs(grouped, output_dir, template_path, file_path, processed_df)
+
+    @staticmethod
+    def group_keys(processed_df):
+        """分组键：Location，On Hold 和 BESS 设备加上后缀独立分组"""
+        group_suffix = processed_df['__status_group'].map({'On Hold': '_OnHold', 'BESS': '_BESS'})
+        return processed_df['Location'].where(
+            group_suffix.isna(),
+            processed_df['Location'].map(str) + group_suffix
+        )
+
+    def preprocess_low_memory(self, file_path, output_dir, template_path):
+        """低内存模式：逐批读取、筛选和计算日期，设备写入按Location的磁盘分片，TotalModel 计数逐批累加"""
+        bess_assets = {}
+        if self.bess_enabled:
+            bess_assets = parse_bess_assets(self.bess_text)
+            self.logger(f"BESS 跟機共: {len(bess_assets)}台")
+        self._pm_engine = None
+        try:
+            self.pm_rule_engine()
+        except ValueError as e:
+            self.logger(f"错误: {e}")
+            return 0
+
+        self.logger(f"正在分批读取总表文件（低内存模式，每批 {self.batch_rows} 行）: {file_path}")
+        self.header_resolution = None
+        self.report_header = None
+        counts = None
+        rule_counts = None
+        bess_matched = set()
+        processed_rows = 0
+        with LocationShards() as shards:
+            try:
+                with self.profile.stage('stream_batches'):
+                    resolved_columns = None
+                    for batch in self.iter_report_batches(file_path, self.batch_rows):
+                        self.check_cancelled()
+                        self.profile.count('batches')
+                        self.profile.count('input_rows', len(batch))
+                        if resolved_columns is None:
+                            resolved_columns = self.resolve_columns(batch.columns)
+                        with self.profile.stage('extract_rows'):
+                            processed = self.extract_rows(batch, resolved_columns, bess_assets)
+                        bess_matched |= self.bess_matched
+                        if processed.empty:
+                            continue
+                        with self.profile.stage('add_pm_dates'):
+                            processed = self.add_pm_dates(processed)
+                        processed_rows += len(processed)
+                        counts = self.add_model_counts(counts, self.model_counts(processed))
+                        batch_rules = PmRuleEngine.rule_counts(processed['__pm_rule'])
+                        rule_counts = batch_rules if rule_counts is None else rule_counts.add(batch_rules, fill_value=0)
+                        with self.profile.stage('spill_shards'):
+                            shards.add(processed, self.group_keys(processed))
+            except ProcessCancelled:
+                raise
+            except Exception as e:
+                self.logger(f"读取文件失败: {e}")
+                return 0
+
+            self.bess_unmatched = [bess_assets[key] for key in bess_assets if key not in bess_matched]
+            self.profile.count('processed_rows', processed_rows)
+            if self.bess_unmatched:
+                self.logger(f"警告: 以下 {len(self.bess_unmatched)} 台 BESS Asset 在总表中找不到: "
+                            f"{', '.join(self.bess_unmatched)}")
+            self.logger(f"成功读取文件: 本月共有「 {processed_rows} 」部機器")
+            if not processed_rows:
+                self.logger("警告: 没有找到有效的Location数据")
+                return 0
+            for line in PmRuleEngine.summary_lines(counts=rule_counts):
+                self.logger(line)
+            if self.checklist_template:
+                self.logger("警告: 低内存模式不生成检查表")
+            # 与整表 groupby 的排序一致
+            counts = counts.groupby(level=[0, 1, 2]).sum()
+            return self.generate_outputs(shards, output_dir, template_path, file_path, None, counts)
+
+    def generate_outputs(self, grouped, output_dir, template_path, file_path, processed_df, model_counts=None):
+        """按分组生成分表、TotalModel、PDF 和检查表；grouped 为 groupby 结果或 LocationShards"""
+        self.profile.count('groups', len(grouped))
+
+        self.logger(f"找到 {len(grouped)} 个不同的Location")
+
+        # 读取上次的生成记录
+        self.manifest_source = self.source_key(file_path)
+        self.manifest = self.load_manifest(output_dir)
+        self.manifest_entries = {}
+        self.skipped_files = []
+        self.write_errors = []
+        self._template_hash = None
+
+        # 为每个Location生成分表
+        try:
+            with self.profile.stage('generate_locations'), self.output_writer():
+                if self.output_mode in ('hospital', 'run'):
+                    self.generate_workbooks(grouped, output_dir, template_path, file_path)
+                elif self.max_workers and self.max_workers > 1 and len(grouped) > 1 and not self.low_memory:
+                    self.generate_locations_parallel(grouped, output_dir, template_path)
+                else:
+                    for done, (location, group) in enumerate(grouped, start=1):
+                        self.logger(f"处理Location: {location}, 设备数: {len(group)}")
+                        self.generate_location_files(group, location, output_dir, template_path)
+                        self.report_progress(done, len(grouped))
+        except ProcessCancelled:
+            # 取消时保留未处理文件的旧记录，下次运行仍可增量
+            self.save_manifest(output_dir, {**self.manifest, **self.manifest_entries})
+            raise
+        finally:
+            self.report_write_errors()
+
+        if self.incremental:
+            self.remove_stale_files(output_dir)
+            if self.skipped_files:
+                self.logger(f"内容未变化，跳过 {len(self.skipped_files)} 个分表")
+        self.save_manifest(output_dir, self.merged_manifest())
+
+        self.total_model(processed_df, output_dir, model_counts)
+
+        if self.export_pdf:
+            self.export_location_pdfs(output_dir)
+
+        if self.checklist_template and processed_df is not None:
+            self.generate_checklists(processed_df, output_dir / "Checklist")
+
+        self.report_profile(output_dir, file_path)
+        return 1
+
+    def export_location_pdfs(self, output_dir):
+        """把本次的全部Location分表导出为 PDF"""
+        files = [output_dir / filename for filename in self.manifest_entries]
+        with self.profile.stage('pdf_export'):
+            converted, skipped, failed, _ = export_pdfs(
+                files, self.pdf_workers, logger=self.logger, cancel_event=self.cancel_event)
+        self.check_cancelled()
+        self.profile.count('pdfs_exported', len(converted))
+        self.logger(f"PDF 导出完成: 新导出 {len(converted)} 个, 未变化跳过 {len(skipped)} 个, 失败 {len(failed)} 个")
+
+    def generate_checklists(self, processed_df, checklist_dir):
+        """用 processed_df 批量填写检查表 PDF"""
+        defaults = {'CheckedBy': self.pm_engineer} if self.pm_engineer else {}
+        try:
+            with self.profile.stage('checklists'):
+                written = generate_checklists(
+                    processed_df, self.checklist_template, checklist_dir, defaults=defaults,
+                    mode=self.checklist_mode, max_workers=self.max_workers, logger=self.logger)
+            self.profile.count('checklists', len(written))
+        except Exception as e:
+            self.logger(f"生成检查表失败: {e}")
+
+    def report_profile(self, output_dir, report_path):
+        """输出各阶段耗时统计，按需保存为 JSON"""
+        for line in self.profile.summary_lines():
+            self.logger(line)
+        if not self.write_profile:
+            return
+        profile_path = output_dir / f"profile_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            self.profile.write_json(
+                profile_path,
+                report=str(report_path),
+                read_engine=self.read_engine,
+                max_workers=self.max_workers,
+                incremental=self.incremental,
+            )
+            self.logger(f"已保存耗时统计: {profile_path}")
+        except OSError as e:
+            self.logger(f"保存耗时统计失败: {e}")
+
+    def run(self):
+        try:
+            result = self.preprocess()
+        except ProcessCancelled:
+            self.logger("===========操作已取消!===========")
+            return 0
+        if result:
+            self.logger("===========操作完成!==========")
+        else:
+            self.logger("===========操作失敗!===========")
+        return result
+
+
+def read_report_task(settings, file_path):
+    """进程池任务：合并模式下读取单个总表，返回改名后的 DataFrame、日志和耗时统计"""
+    messages = []
+    reader = ExcelProcess(None, None, None, file_path, logger=messages.append)
+    reader.read_engine = settings['read_engine']
+    reader.report_cache = settings['report_cache']
+    reader.dynamic_header_rules = settings['dynamic_header_rules']
+    return reader.read_target_columns(file_path), messages, reader.profile.to_dict()
+
+
+_worker_cancel_event = None
+
+
+def init_generate_worker(cancel_event):
+    """进程池 initializer：保存父进程的取消标记"""
+    global _worker_cancel_event
+    _worker_cancel_event = cancel_event
+
+
+def generate_location_task(settings, location_df, location, output_dir, template_path):
+    """进程池任务：在子进程中生成单个Location的分表，返回日志、生成记录、跳过的文件、耗时统计和写入错误"""
+    messages = []
+    processor = ExcelProcess(
+        settings['pm_engineer'],
+        settings['pm_phone_number'],
+        template_path,
+        None,
+        logger=messages.append
+    )
+    processor.pm_rules = settings['pm_rules']
+    processor.default_pm_offset = settings['default_pm_offset']
+    processor.pm_rule_file = settings['pm_rule_file']
+    processor.col_map = settings['col_map']
+    processor.incremental = settings['incremental']
+    processor.manifest = settings['manifest']
+    processor.manifest_source = settings['manifest_source']
+    processor.xlsx_writer = settings['xlsx_writer']
+    processor.async_write = settings['async_write']
+    if _worker_cancel_event is not None:
+        processor.cancel_event = _worker_cancel_event
+    with processor.output_writer():
+        processor.generate_location_files(location_df, location, output_dir, template_path)
+    errors = [(str(path), str(error)) for path, error in processor.write_errors]
+    return messages, processor.manifest_entries, processor.skipped_files, processor.profile.to_dict(), errors
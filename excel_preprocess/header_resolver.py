@@ -0,0 +1,93 @@
+import json
+import re
+import threading
+
+
+class HeaderResolution:
+    """一次表头匹配的结果：目标栏位 -> 表头（未找到为 None），以及缺失和重复匹配的栏位"""
+
+    def __init__(self, columns, missing, ambiguous):
+        self.columns = columns
+        self.missing = missing  # [目标栏位]
+        self.ambiguous = ambiguous  # {目标栏位: [所有匹配的表头]}，取第一个
+
+    def messages(self):
+        lines = []
+        if self.missing:
+            lines.append(f"警告: 表头未找到: {', '.join(self.missing)}")
+        for target, matches in self.ambiguous.items():
+            lines.append(f"警告: {target} 匹配到多个表头 {matches}，使用「{matches[0]}」")
+        return lines
+
+
+class HeaderResolver:
+    """把 dynamic_header_rules 的所有关键字预编译成一个匹配器，按表头指纹缓存匹配结果"""
+
+    max_cached = 64
+
+    def __init__(self, rules):
+        self.targets = list(rules)
+        self.patterns = [
+            (target, re.compile(pattern))
+            for target, keywords in rules.items()
+            for pattern in keywords
+        ]
+        try:
+            # 合并的匹配器只用来快速排除无关表头，命中后再逐个规则确认
+            self.matcher = re.compile("|".join(f"(?:{pattern.pattern})" for _, pattern in self.patterns))
+        except re.error:
+            # 规则中含反向引用等无法合并的写法时逐个匹配
+            self.matcher = None
+        self._cache = {}  # 表头指纹 -> (目标栏位 -> 表头位置列表)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(column):
+        return str(column).strip().lower()
+
+    def _match(self, normalized):
+        matches = {target: [] for target in self.targets}
+        for idx, name in enumerate(normalized):
+            if self.matcher is not None and not self.matcher.fullmatch(name):
+                continue
+            for target, pattern in self.patterns:
+                found = matches[target]
+                if pattern.fullmatch(name) and (not found or found[-1] != idx):
+                    found.append(idx)
+        return matches
+
+    def resolve(self, columns):
+        """按表头顺序为每个目标栏位找到第一个匹配的表头"""
+        columns = list(columns)
+        fingerprint = tuple(self.normalize(col) for col in columns)
+        with self._lock:
+            matches = self._cache.get(fingerprint)
+        if matches is None:
+            matches = self._match(fingerprint)
+            with self._lock:
+                if len(self._cache) >= self.max_cached:
+                    self._cache.clear()
+                self._cache[fingerprint] = matches
+
+        resolved = {target: columns[found[0]] if found else None for target, found in matches.items()}
+        missing = [target for target, found in matches.items() if not found]
+        ambiguous = {
+            target: [columns[idx] for idx in found]
+            for target, found in matches.items() if len(found) > 1
+        }
+        return HeaderResolution(resolved, missing, ambiguous)
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_header_resolver(rules):
+    """同样的规则共用一个 HeaderResolver（批量处理多个总表时共享缓存）"""
+    # 规则顺序决定输出栏位顺序，键中保留顺序
+    key = json.dumps(rules)
+    with _resolvers_lock:
+        resolver = _resolvers.get(key)
+        if resolver is None:
+            resolver = _resolvers[key] = HeaderResolver(rules)
+        return resolver
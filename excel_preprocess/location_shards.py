@@ -0,0 +1,82 @@
+import importlib.util
+import pickle
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from report_cache import ReportCache, read_feather, save_verified_feather
+
+
+class LocationShards:
+    """低内存模式的磁盘分片：逐批把筛选后的设备行按分组键（Location）写到临时目录，之后逐个分组读回
+
+    迭代方式与 DataFrame.groupby 相同（按键排序，返回 (键, DataFrame)），同一时间只有一个分组在内存中。
+    安装了 pyarrow 时分片保存为 Feather 并读回核对；含混合类型的列 Arrow 无法原样保存，此时该分片改用 pickle。
+    """
+
+    def __init__(self, prefix="gepm_shards_"):
+        self._tmp = tempfile.TemporaryDirectory(prefix=prefix)
+        self.root = Path(self._tmp.name)
+        self.use_feather = importlib.util.find_spec('pyarrow') is not None
+        self.parts = {}  # 分组键 -> [(分片文件, 格式, dtypes)]
+        self.rows = {}  # 分组键 -> 行数
+        self.key_ids = {}  # 分组键 -> 分片文件名序号
+
+    def add(self, df, keys):
+        """按 keys 分组写出；键为空的行与 groupby 一样被丢弃"""
+        for key, part in df.groupby(keys, sort=False):
+            self.write_part(key, part.reset_index(drop=True))
+
+    def write_part(self, key, part):
+        if key not in self.parts:
+            self.parts[key] = []
+            self.key_ids[key] = len(self.key_ids)
+        parts = self.parts[key]
+        # 文件名只用序号，Location 名称可能含不能用于文件名的字符
+        base = self.root / f"{self.key_ids[key]}_{len(parts)}"
+        dtypes = [str(dtype) for dtype in part.dtypes]
+        if self.use_feather:
+            path = base.with_suffix(".feather")
+            # 与总表缓存相同：写入后读回核对，不能原样还原时改用 pickle
+            if save_verified_feather(part, path, dtypes):
+                parts.append((path, 'feather', dtypes))
+                self.rows[key] = self.rows.get(key, 0) + len(part)
+                return
+        # 分片目录是本次运行私有的临时目录，读回 pickle 没有读取他人文件的风险
+        path = base.with_suffix(".pkl")
+        part.to_pickle(path, protocol=pickle.HIGHEST_PROTOCOL)
+        parts.append((path, 'pickle', dtypes))
+        self.rows[key] = self.rows.get(key, 0) + len(part)
+
+    def load(self, key):
+        frames = []
+        for path, fmt, dtypes in self.parts[key]:
+            if fmt == 'feather':
+                frames.append(ReportCache.restore_dtypes(read_feather(path), dtypes))
+            else:
+                frames.append(pd.read_pickle(path))
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def keys(self):
+        try:
+            return sorted(self.parts)
+        except TypeError:
+            # 数字和文字混合的键无法排序，按出现顺序
+            return list(self.parts)
+
+    def __len__(self):
+        return len(self.parts)
+
+    def __iter__(self):
+        for key in self.keys():
+            yield key, self.load(key)
+
+    def close(self):
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,72 @@
+import logging
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QTimer, Slot
+
+LOG_FILE_NAME = "GEpmTool.log"
+
+
+class BatchedLogSink(QObject):
+    """UI 日志窗口的缓冲输出：消息先放进缓冲区，定时一次性追加，避免每条日志都重新排版
+
+    窗口最多保留 max_blocks 行（超出时丢弃最早的行），完整日志另写到 Output 目录的轮转日志文件。
+    """
+
+    def __init__(self, widget, interval_ms=100, max_blocks=5000, parent=None):
+        super().__init__(parent)
+        self.widget = widget
+        self.widget.setMaximumBlockCount(max_blocks)
+        self.buffer = []
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+        self.file_logger = None
+
+    @Slot(str)
+    def append(self, text):
+        self.buffer.append(text)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    @Slot()
+    def flush(self):
+        if not self.buffer:
+            return
+        lines, self.buffer = self.buffer, []
+        # 一次追加整批文本，窗口只排版一次
+        self.widget.appendPlainText("\n".join(lines))
+        if self.file_logger is not None:
+            for line in lines:
+                self.file_logger.info(line)
+
+    def clear(self):
+        self.flush()
+        self.widget.clear()
+
+    def open_file(self, output_dir, max_bytes=2 * 1024 * 1024, backup_count=3):
+        """开始把日志写到 output_dir/GEpmTool.log（超过 max_bytes 时轮转，保留 backup_count 个旧文件）"""
+        self.close_file()
+        try:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(Path(output_dir) / LOG_FILE_NAME, maxBytes=max_bytes,
+                                          backupCount=backup_count, encoding="utf-8")
+        except OSError as e:
+            self.append(f"警告: 无法创建日志文件: {e}")
+            return
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger = logging.getLogger(f"GEpmTool.log.{id(self)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.file_logger = logger
+
+    def close_file(self):
+        self.flush()
+        if self.file_logger is None:
+            return
+        for handler in list(self.file_logger.handlers):
+            self.file_logger.removeHandler(handler)
+            handler.close()
+        self.file_logger = None
@@ -0,0 +1,117 @@
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 常见的 LibreOffice 安装位置（不在 PATH 中时使用）
+SOFFICE_CANDIDATES = [
+    "/Applications/LibreOffice.app/Contents/MacOS/soffice",
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+]
+
+
+def find_soffice():
+    """查找 LibreOffice 可执行文件，找不到返回 None"""
+    for name in ("soffice", "libreoffice"):
+        found = shutil.which(name)
+        if found:
+            return found
+    for candidate in SOFFICE_CANDIDATES:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def pdf_path_for(xlsx_path):
+    return Path(xlsx_path).with_suffix(".pdf")
+
+
+def pdf_is_current(xlsx_path):
+    """PDF 已存在且比 xlsx 新时不需要重新转换"""
+    pdf_path = pdf_path_for(xlsx_path)
+    try:
+        return pdf_path.stat().st_mtime >= Path(xlsx_path).stat().st_mtime
+    except OSError:
+        return False
+
+
+def convert_batch(soffice, profile_dir, files, timeout=300):
+    """用一个 LibreOffice 实例转换一批 xlsx（打印设置沿用工作簿的页面设置），返回转换失败的文件"""
+    output_dir = Path(files[0]).parent
+    command = [
+        soffice,
+        "--headless", "--norestore", "--nolockcheck",
+        # 每个并行实例使用独立的用户配置目录，否则第二个实例会直接退出
+        f"-env:UserInstallation={Path(profile_dir).as_uri()}",
+        "--convert-to", "pdf",
+        "--outdir", str(output_dir),
+        *[str(f) for f in files],
+    ]
+    creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+    try:
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=timeout, check=False, creationflags=creationflags)
+    except subprocess.TimeoutExpired:
+        pass
+    return [f for f in files if not pdf_is_current(f)]
+
+
+def export_pdfs(xlsx_files, max_workers=2, batch_size=10, logger=print, cancel_event=None, soffice=None):
+    """批量把 xlsx 转为同名 PDF；PDF 比 xlsx 新的文件跳过。返回 (已转换, 跳过, 失败, 已取消) 文件列表"""
+    pending = [Path(f) for f in xlsx_files if not pdf_is_current(f)]
+    skipped = [Path(f) for f in xlsx_files if Path(f) not in pending]
+    if not pending:
+        return [], skipped, [], []
+
+    soffice = soffice or find_soffice()
+    if not soffice:
+        logger("错误: 未找到 LibreOffice (soffice)，无法导出 PDF")
+        return [], skipped, pending, []
+
+    # 按输出目录分批（--outdir 每批只能指定一个）
+    batches = []
+    by_dir = {}
+    for f in pending:
+        by_dir.setdefault(f.parent, []).append(f)
+    for files in by_dir.values():
+        batches.extend(files[i:i + batch_size] for i in range(0, len(files), batch_size))
+
+    workers = max(1, min(max_workers, len(batches)))
+    logger(f"导出 PDF: {len(pending)} 个文件, {workers} 个 LibreOffice 进程")
+    failed = []
+    cancelled = []  # 取消后未开始的批次，不算转换失败
+    with tempfile.TemporaryDirectory(prefix="gepm_lo_") as root:
+        # 配置目录池：同一时间每个目录只被一个 LibreOffice 实例使用
+        profiles = queue.Queue()
+        for idx in range(workers):
+            profiles.put(Path(root) / f"profile{idx}")
+
+        def run(batch):
+            """返回 (失败的文件, 已取消的文件)"""
+            if cancel_event is not None and cancel_event.is_set():
+                return [], batch
+            profile_dir = profiles.get()
+            try:
+                return convert_batch(soffice, profile_dir, batch), []
+            finally:
+                profiles.put(profile_dir)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for done, (batch_failed, batch_cancelled) in enumerate(executor.map(run, batches), start=1):
+                failed.extend(batch_failed)
+                cancelled.extend(batch_cancelled)
+                if not batch_cancelled:
+                    logger(f"PDF 导出进度: {done}/{len(batches)} 批")
+
+    not_converted = set(failed) | set(cancelled)
+    converted = [f for f in pending if f not in not_converted]
+    for f in failed:
+        logger(f"导出 PDF 失败: {f.name}")
+    if cancelled:
+        logger(f"已取消，{len(cancelled)} 个文件未导出 PDF")
+    return converted, skipped, failed, cancelled
@@ -1,16 +1,27 @@
-from PyPDF2 import PdfWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-import io
-from pdf2image import convert_from_path  # 需要安裝 pdf2image 和 poppler
+import sys
+from itertools import chain
+from pathlib import Path
+
+from pypdf import PageObject, PdfReader, PdfWriter, Transformation
+
+# A4 尺寸 (pt)，取 4 位小数：完整的浮点数会被原样写成几十位小数，部分阅读器拒绝读取
+A4 = (595.2756, 841.8898)
+PRECISION = 4
+
 
 def merge_pdfs_horizontally_reportlab(pdf1_path, pdf2_path, output_path):
+    # 光栅化方式（需要 reportlab、pdf2image 和 poppler），保留作对照
+    import io
+    from pdf2image import convert_from_path  # 需要安裝 pdf2image 和 poppler
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
     A4_WIDTH, A4_HEIGHT = A4
 
-    # 將 PDF 轉為圖片
-    pages1 = convert_from_path(pdf1_path, dpi=300)
-    pages2 = convert_from_path(pdf2_path, dpi=300)
+    # 將 PDF 轉為圖片（只需要第一頁）
+    pages1 = convert_from_path(pdf1_path, dpi=300, first_page=1, last_page=1)
+    pages2 = convert_from_path(pdf2_path, dpi=300, first_page=1, last_page=1)
     img1 = pages1[0]
     img2 = pages2[0]
     # 順時針旋轉 90 度
@@ -28,9 +39,8 @@ def merge_pdfs_horizontally_reportlab(pdf1_path, pdf2_path, output_path):
     c.showPage()
     c.save()
 
-    # 將 reportlab 生成的 PDF 與 PyPDF2 寫出
+    # 將 reportlab 生成的 PDF 與 pypdf 寫出
     packet.seek(0)
-    from PyPDF2 import PdfReader
     reader = PdfReader(packet)
     writer = PdfWriter()
     writer.add_page(reader.pages[0])
@@ -38,5 +48,88 @@ def merge_pdfs_horizontally_reportlab(pdf1_path, pdf2_path, output_path):
     with open(output_path, "wb") as f:
         writer.write(f)
 
+
+def place_rotated(sheet, page, x, y, width, height):
+    """把 page 顺时针旋转 90 度，按比例缩放后居中放到 sheet 的 (x, y, width, height) 区域（矢量，不光栅化）"""
+    if page.rotation:
+        # 先把页面自带的 /Rotate 转成内容变换
+        page.transfer_rotation_to_content()
+    box = page.mediabox
+    left, bottom = float(box.left), float(box.bottom)
+    page_width, page_height = float(box.width), float(box.height)
+    # 旋转后宽高互换
+    scale = min(width / page_height, height / page_width)
+    offset_x = x + (width - page_height * scale) / 2
+    offset_y = y + (height - page_width * scale) / 2
+    # 顺时针 90 度：(x, y) -> (s*y + tx, -s*x + ty)；直接写出矩阵，避免 cos(-90°) 的浮点误差
+    ctm = (0, -scale, scale, 0, offset_x - scale * bottom, offset_y + scale * (page_width + left))
+    sheet.merge_transformed_page(page, Transformation(tuple(round(value, PRECISION) for value in ctm)))
+
+
+def iter_pages(pdf_paths, first_page_only=False):
+    """逐个文件按需读取输入页面（只是读取端按需；拼好的页面仍全部保存在 merge_two_up 的 writer 中）"""
+    for path in pdf_paths:
+        reader = PdfReader(str(path))
+        if first_page_only:
+            yield reader.pages[0]
+        else:
+            yield from reader.pages
+
+
+def merge_two_up(pages, output_path):
+    """每两页拼成一张 A4：第一页放上半部，第二页放下半部；返回生成的页数
+
+    PdfWriter 只能在最后一次写出整个文档，输出的全部页面（及其引用的原页面内容）都保留在内存中直到写出。
+    这里有意不分段写出：分段文件最后仍要合并进同一个 PdfWriter，峰值内存不会降低；输入端逐个文件读取。
+    """
+    writer = PdfWriter()
+    width, height = A4
+    pages = iter(pages)
+    count = 0
+    for top in pages:
+        bottom = next(pages, None)
+        # 先在独立的空白页上合并，再加入 writer（直接合并到 writer 的页面会丢失内容）
+        sheet = PageObject.create_blank_page(None, width, height)
+        place_rotated(sheet, top, 0, height / 2, width, height / 2)
+        if bottom is not None:
+            place_rotated(sheet, bottom, 0, 0, width, height / 2)
+        writer.add_page(sheet)
+        count += 1
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return count
+
+
+def merge_pdfs_horizontally(pdf1_path, pdf2_path, output_path, all_pages=False):
+    """矢量方式合并两个 PDF：默认只取各自第一页；all_pages=True 时逐页配对"""
+    if not all_pages:
+        return merge_two_up(iter_pages([pdf1_path, pdf2_path], first_page_only=True), output_path)
+    pairs = zip(iter_pages([pdf1_path]), iter_pages([pdf2_path]))
+    return merge_two_up(chain.from_iterable(pairs), output_path)
+
+
+def expand_inputs(inputs):
+    """文件夹展开为其中的 PDF（按文件名排序）"""
+    paths = []
+    for item in map(Path, inputs):
+        if item.is_dir():
+            paths.extend(sorted(item.glob("*.pdf")))
+        else:
+            paths.append(item)
+    return paths
+
+
+def merge_directory(inputs, output_path, first_page_only=False):
+    """把多个 PDF 或文件夹中的所有页面依次两两拼页，输出到一个文件"""
+    output_path = Path(output_path)
+    paths = [p for p in expand_inputs(inputs) if p.resolve() != output_path.resolve()]
+    return merge_two_up(iter_pages(paths, first_page_only), output_path)
+
+
 if __name__ == "__main__":
-    merge_pdfs_horizontally_reportlab("../Doc/pdf1.pdf", "../Doc/pdf2.pdf", "../Doc/merged.pdf")
\ No newline at end of file
+    if len(sys.argv) > 2:
+        # python pdf_merge.py 输出.pdf 输入1.pdf 输入2.pdf 文件夹 ...
+        sheets = merge_directory(sys.argv[2:], sys.argv[1])
+        print(f"已生成 {sys.argv[1]}: {sheets} 页")
+    else:
+        merge_pdfs_horizontally("../Doc/pdf1.pdf", "../Doc/pdf2.pdf", "../Doc/merged.pdf")
@@ -0,0 +1,176 @@
+import heapq
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 规则文件格式（JSON）：规则按顺序优先，第一条全部条件都满足的规则生效，都不满足时使用 default_offset
+# {
+#   "default_offset": 12,
+#   "rules": [
+#     {"name": "除颤器", "description": "DEFIBRILLATOR", "months": 6},
+#     {"name": "GE 呼吸机", "manufacturer": "GE", "model": ["CARESCAPE R860"], "months": 6},
+#     {"name": "输液泵", "description_regex": "INFUSION|SYRINGE PUMP", "hospital": ["QEH"], "months": 3}
+#   ]
+# }
+# model / manufacturer / hospital 可为字符串或列表，忽略大小写和前后空白完全匹配；
+# description 为区分大小写的关键字（包含即匹配），description_regex 为正则表达式（search）。
+CONDITION_KEYS = ('model', 'manufacturer', 'hospital')
+# 编号反向引用（\1）或条件分组（(?(1)...)）
+BACKREF_RE = re.compile(r'\\\d|\(\?\(')
+
+
+def is_missing(value):
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+def normalize_key(value):
+    if is_missing(value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # 数字型号（如 Model 为 800.0）与规则中的 "800" 相同
+        value = int(value)
+    return str(value).strip().upper()
+
+
+class PmRule:
+    def __init__(self, index, spec):
+        if 'months' not in spec:
+            raise ValueError(f"PM规则 #{index + 1} 缺少 months")
+        self.index = index
+        self.name = str(spec.get('name') or f"rule{index + 1}")
+        self.months = int(spec['months'])
+        self.conditions = {}
+        for key in CONDITION_KEYS:
+            values = spec.get(key)
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            self.conditions[key] = {normalize_key(value) for value in values}
+        if 'description' in spec:
+            self.pattern = re.escape(str(spec['description']))
+        elif 'description_regex' in spec:
+            self.pattern = str(spec['description_regex'])
+        else:
+            self.pattern = None
+        try:
+            self.regex = re.compile(self.pattern) if self.pattern is not None else None
+        except re.error as e:
+            raise ValueError(f"PM规则「{self.name}」的正则表达式无效: {e}") from e
+        if not self.conditions and self.regex is None:
+            raise ValueError(f"PM规则「{self.name}」没有任何匹配条件")
+
+
+class PmRuleEngine:
+    """把 PM 规则编译成查找表：Model 用哈希表精确匹配，Description 用一个合并的正则预筛选
+
+    同样的 (Manufacture, Model, Description, Hospital) 组合只计算一次，规则数增加时每个组合只检查候选规则。
+    """
+
+    def __init__(self, rules, default_offset=12):
+        self.rules = [PmRule(index, spec) for index, spec in enumerate(rules)]
+        self.default_offset = int(default_offset)
+        self.by_model = {}  # Model -> 有 model 条件的规则序号
+        self.by_description = set()  # 有 Description 条件、没有 model 条件的规则序号
+        self.unindexed = []  # 只有 manufacturer / hospital 条件的规则序号
+        for rule in self.rules:
+            if 'model' in rule.conditions:
+                for model in rule.conditions['model']:
+                    self.by_model.setdefault(model, []).append(rule.index)
+            elif rule.regex is not None:
+                self.by_description.add(rule.index)
+            else:
+                self.unindexed.append(rule.index)
+
+        patterns = [rule.pattern for rule in self.rules if rule.pattern is not None]
+        try:
+            # 合并的正则只用来快速排除不匹配任何规则的 Description，命中后再逐条确认
+            # 合并后分组编号会改变，含编号反向引用或条件分组时不合并
+            if not patterns or any(BACKREF_RE.search(pattern) for pattern in patterns):
+                self.matcher = None
+            else:
+                self.matcher = re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+        except re.error:
+            # 含全局标记或重复组名等无法合并的写法时逐条匹配
+            self.matcher = None
+        self._description_hits = {}
+
+    @classmethod
+    def from_keywords(cls, keywords, default_offset=12):
+        """旧的 pm_rules 字典 {Description关键字: 月数}"""
+        return cls([{'name': keyword, 'description': keyword, 'months': months}
+                    for keyword, months in keywords.items()], default_offset)
+
+    @classmethod
+    def from_file(cls, path, default_offset=12):
+        try:
+            config = json.loads(Path(path).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"无法读取PM规则文件 {path}: {e}") from e
+        if isinstance(config, list):
+            config = {'rules': config}
+        return cls(config.get('rules', []), config.get('default_offset', default_offset))
+
+    def description_hits(self, description):
+        """Description 匹配到的规则序号集合（按 Description 缓存）"""
+        hits = self._description_hits.get(description)
+        if hits is None:
+            text = "" if description is None else str(description)
+            if self.matcher is not None and not self.matcher.search(text):
+                hits = frozenset()
+            else:
+                hits = frozenset(rule.index for rule in self.rules
+                                 if rule.regex is not None and rule.regex.search(text))
+            self._description_hits[description] = hits
+        return hits
+
+    def match(self, manufacturer, model, description, hospital):
+        """返回第一条满足的规则，没有时返回 None"""
+        values = {'manufacturer': normalize_key(manufacturer), 'model': normalize_key(model),
+                  'hospital': normalize_key(hospital)}
+        hits = frozenset() if is_missing(description) else self.description_hits(description)
+        candidates = heapq.merge(
+            self.by_model.get(values['model'], ()),
+            sorted(hits & self.by_description),
+            self.unindexed,
+        )
+        for index in candidates:
+            rule = self.rules[index]
+            if rule.regex is not None and index not in hits:
+                continue
+            if all(values[key] in allowed for key, allowed in rule.conditions.items()):
+                return rule
+        return None
+
+    def apply(self, df):
+        """按整表计算每行的偏移月数和生效的规则名，返回 (offsets, rule_names)"""
+        offsets = pd.Series(self.default_offset, index=df.index)
+        rule_names = pd.Series(None, index=df.index, dtype=object)
+        if not self.rules or df.empty:
+            return offsets, rule_names
+        columns = {'Manufacture': 'manufacturer', 'Model': 'model', 'Description': 'description',
+                   'Hospital': 'hospital'}
+        keys = pd.DataFrame({arg: df[col] if col in df.columns else None for col, arg in columns.items()},
+                            index=df.index)
+        # 相同的栏位组合只匹配一次，再按组合编号映射回每行
+        codes, uniques = pd.factorize(pd.MultiIndex.from_frame(keys.astype(object)))
+        matched = [self.match(**dict(zip(keys.columns, combo))) for combo in uniques]
+        months = np.array([rule.months if rule else self.default_offset for rule in matched])
+        names = np.array([rule.name if rule else None for rule in matched], dtype=object)
+        offsets[:] = months[codes]
+        rule_names[:] = names[codes]
+        return offsets, rule_names
+
+    @staticmethod
+    def rule_counts(rule_names):
+        """每条规则命中的设备数（未命中规则的计为「(默认)」）"""
+        return rule_names.fillna("(默认)").value_counts(sort=False)
+
+    @classmethod
+    def summary_lines(cls, rule_names=None, counts=None):
+        if counts is None:
+            counts = cls.rule_counts(rule_names)
+        return [f"PM规则命中: {name}: {int(count)} 台" for name, count in counts.items()]
@@ -0,0 +1,179 @@
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# 缓存格式变化时加一，旧缓存自动失效
+CACHE_VERSION = 2
+
+
+def cache_dir():
+    """当前用户的缓存目录；缓存不放在总表旁边，共享或下载目录中他人放置的文件不会被读取"""
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "GEpmTool" / "report_cache"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def replace_file(path, write):
+    """先写到临时文件再替换，中途失败不会留下半个缓存文件"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def write_feather(df, path):
+    """写不压缩的 Feather：默认的 lz4 压缩读取时要先解压，内存映射就没有意义"""
+    df.to_feather(path, compression='uncompressed')
+
+
+def read_feather(path):
+    """以内存映射方式读取 Feather（pd.read_feather 不提供 memory_map 选项）"""
+    from pyarrow import feather
+
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def save_verified_feather(df, path, dtypes):
+    """写 Feather 并读回核对，无法原样还原（值或类型不同）时删除文件并返回 False"""
+    try:
+        # Feather 只接受默认索引和字符串列名
+        replace_file(path, lambda tmp: write_feather(df.reset_index(drop=True), tmp))
+        restored = ReportCache.restore_dtypes(read_feather(path), dtypes)
+    except Exception:
+        if path.exists():
+            path.unlink()
+        return False
+    same = (list(restored.columns) == list(df.columns)
+            and [str(dtype) for dtype in restored.dtypes] == dtypes
+            and restored.equals(df.reset_index(drop=True)))
+    if not same:
+        path.unlink()
+    return same
+
+
+class ReportCache:
+    """总表解析结果的列式缓存，保存在用户缓存目录（cache_dir()，文件名为总表路径的哈希）
+
+    以总表的 (大小, 修改时间, sha256) 和读取设置为键：大小和修改时间未变时直接使用；
+    只有修改时间变化时核对 sha256，内容相同仍然命中。安装了 pyarrow 时保存为 Feather 并以内存映射读取，
+    含混合类型的列（如 Asset ID 同时有数字和文字）Arrow 无法原样保存，此时改用 pickle。
+    """
+
+    def __init__(self, report_path, settings, root=None):
+        self.report_path = Path(report_path)
+        self.settings = settings  # 影响读取结果的设置（表头规则、读取方式），变化时缓存失效
+        self.root = Path(root) if root is not None else cache_dir()
+        key = hashlib.sha256(str(self.report_path.resolve()).encode('utf-8')).hexdigest()[:32]
+        self.meta_path = self.root / f"{key}.json"
+        self.data_paths = {
+            'feather': self.root / f"{key}.feather",
+            'pickle': self.root / f"{key}.pkl",
+        }
+        self.format = None  # 最近一次读写使用的格式
+
+    def read_meta(self):
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if (meta.get('version') != CACHE_VERSION or meta.get('settings') != self.settings
+                or meta.get('report') != str(self.report_path.resolve())):
+            return None
+        return meta
+
+    def load(self):
+        """命中时返回 (DataFrame, 原始表头)，否则返回 None"""
+        meta = self.read_meta()
+        if meta is None:
+            return None
+        stat = self.report_path.stat()
+        stamp = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if meta['source'] != stamp:
+            if meta['size'] != stat.st_size or meta['sha256'] != file_sha256(self.report_path):
+                return None
+            # 内容未变（例如重新复制了文件），更新记录的修改时间
+            meta['source'] = stamp
+            self.write_meta(meta)
+
+        data_path = self.data_paths.get(meta['format'])
+        try:
+            if meta['format'] == 'feather':
+                df = self.restore_dtypes(read_feather(data_path), meta['dtypes'])
+            else:
+                df = pd.read_pickle(data_path)
+        except Exception:
+            # 缓存文件损坏或缺失，按未命中处理
+            return None
+        self.format = meta['format']
+        return df, meta['header']
+
+    @staticmethod
+    def restore_dtypes(df, dtypes):
+        """Arrow 会把纯文字的 object 列读回为 str 类型，转回原来的 object"""
+        for column, dtype in zip(df.columns, dtypes):
+            if dtype == 'object' and df[column].dtype != object:
+                df[column] = df[column].astype(object)
+        return df
+
+    def save(self, df, header):
+        """保存解析结果，返回使用的格式"""
+        stat = self.report_path.stat()
+        sha256 = file_sha256(self.report_path)
+        dtypes = [str(dtype) for dtype in df.dtypes]
+        # 只有当前用户可以写入缓存目录
+        self.root.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fmt = 'pickle'
+        if importlib.util.find_spec('pyarrow') and self.save_feather(df, dtypes):
+            fmt = 'feather'
+        else:
+            replace_file(self.data_paths['pickle'],
+                         lambda path: df.to_pickle(path, protocol=pickle.HIGHEST_PROTOCOL))
+        # 删除另一种格式的旧缓存
+        for other, path in self.data_paths.items():
+            if other != fmt and path.exists():
+                path.unlink()
+        self.write_meta({
+            'version': CACHE_VERSION,
+            'report': str(self.report_path.resolve()),
+            'settings': self.settings,
+            'source': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+            'size': stat.st_size,
+            'sha256': sha256,
+            'format': fmt,
+            'dtypes': dtypes,
+            'header': [None if value is None else str(value) for value in header],
+        })
+        self.format = fmt
+        return fmt
+
+    def save_feather(self, df, dtypes):
+        return save_verified_feather(df, self.data_paths['feather'], dtypes)
+
+    def write_meta(self, meta):
+        replace_file(self.meta_path, lambda path: path.write_text(json.dumps(meta), encoding='utf-8'))
+
+    def clear(self):
+        for path in (self.meta_path, *self.data_paths.values()):
+            if path.exists():
+                path.unlink()
@@ -0,0 +1,56 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class RunProfile:
+    """记录处理流程各阶段耗时和计数，用于比较不同运行的性能"""
+
+    def __init__(self, started=None):
+        self.stages = {}  # 阶段名 -> {'seconds': 累计耗时, 'calls': 次数}
+        self.counters = {}
+        # started 为 time.perf_counter() 的值，默认从创建时开始计时
+        self.started = time.perf_counter() if started is None else started
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds, calls=1):
+        stage = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        stage['seconds'] += seconds
+        stage['calls'] += calls
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, data):
+        """合并子进程返回的 to_dict() 结果"""
+        for name, stage in data.get('stages', {}).items():
+            self.add_time(name, stage['seconds'], stage['calls'])
+        for name, amount in data.get('counters', {}).items():
+            self.count(name, amount)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def to_dict(self):
+        return {'stages': self.stages, 'counters': self.counters}
+
+    def summary_lines(self):
+        lines = ["========== 运行耗时统计 ==========", f"{'阶段':<24}{'耗时(s)':>10}{'次数':>8}"]
+        for name, stage in self.stages.items():
+            lines.append(f"{name:<24}{stage['seconds']:>10.3f}{stage['calls']:>8}")
+        lines.append(f"{'总耗时':<24}{self.elapsed():>10.3f}")
+        if self.counters:
+            lines.append("计数: " + ", ".join(f"{name}={amount}" for name, amount in self.counters.items()))
+        return lines
+
+    def write_json(self, path, **meta):
+        data = dict(meta, total_seconds=round(self.elapsed(), 6), **self.to_dict())
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 模块在 excel_preprocess 目录下平铺，测试直接按模块名导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from checklist_batch import checklist_jobs
+
+
+def make_df():
+    return pd.DataFrame({
+        'Asset ID': [1, 2, 3, 3],
+        'Location': ["W/1", np.nan, "W/1", "W/1"],
+        'Hospital': ["H"] * 4,
+        'Model': ["M"] * 4,
+    })
+
+
+def test_asset_names_use_fallback_and_stay_unique():
+    jobs = checklist_jobs(make_df(), Path("out"), {}, per_location=False)
+    assert [path.name for path, _ in jobs] == ["W1_1.pdf", "NoLocation_2.pdf", "W1_3.pdf", "W1_3~2.pdf"]
+
+
+def test_location_mode_keeps_blank_location():
+    jobs = checklist_jobs(make_df(), Path("out"), {}, per_location=True)
+    assert [(path.name, len(pages)) for path, pages in jobs] == [
+        ("W1_Checklist.pdf", 3), ("NoLocation_Checklist.pdf", 1)]
+
+
+def make_form_pdf(path, title="Checklist"):
+    """带 Text4（文本）和 5（复选框）两个字段的简单表单"""
+    from pypdf import PdfWriter
+    from pypdf.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, NameObject,
+                               NumberObject, TextStringObject)
+
+    writer = PdfWriter()
+    page = writer.add_blank_page(300, 200)
+    writer.add_metadata({'/Title': title})
+
+    def appearance():
+        stream = DecodedStreamObject()
+        stream.set_data(b"")
+        stream[NameObject('/Type')] = NameObject('/XObject')
+        stream[NameObject('/Subtype')] = NameObject('/Form')
+        stream[NameObject('/BBox')] = ArrayObject([NumberObject(0)] * 2 + [NumberObject(10)] * 2)
+        return writer._add_object(stream)
+
+    text = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Annot'), NameObject('/Subtype'): NameObject('/Widget'),
+        NameObject('/FT'): NameObject('/Tx'), NameObject('/T'): TextStringObject('Text4'),
+        NameObject('/Rect'): ArrayObject([NumberObject(v) for v in (10, 150, 200, 170)]),
+    }))
+    box = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Annot'), NameObject('/Subtype'): NameObject('/Widget'),
+        NameObject('/FT'): NameObject('/Btn'), NameObject('/T'): TextStringObject('5'),
+        NameObject('/V'): NameObject('/Off'), NameObject('/AS'): NameObject('/Off'),
+        NameObject('/Rect'): ArrayObject([NumberObject(v) for v in (10, 100, 20, 110)]),
+        NameObject('/AP'): DictionaryObject({NameObject('/N'): DictionaryObject({
+            NameObject('/On'): appearance(), NameObject('/Off'): appearance()})}),
+    }))
+    page[NameObject('/Annots')] = ArrayObject([text, box])
+    writer._root_object[NameObject('/AcroForm')] = writer._add_object(DictionaryObject({
+        NameObject('/Fields'): ArrayObject([text, box])}))
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def test_fill_and_concat_forms(tmp_path):
+    from pypdf import PdfReader
+
+    from checklist_batch import generate_checklists
+
+    template = tmp_path / "form.pdf"
+    make_form_pdf(template)
+    df = make_df()
+    written = generate_checklists(df, template, tmp_path / "out", defaults={'ModelType': 'BF'},
+                                  mode='location', logger=lambda message: None)
+    reader = PdfReader(written[0])
+    assert len(reader.pages) == 3
+    fields = {name: field.get('/V') for name, field in reader.get_fields().items()}
+    # 合并后字段名加序号；复选框使用模板中的勾选状态名 /On
+    assert [fields[f"Text4_{n}"] for n in (1, 2, 3)] == ["1", "3", "3"]
+    assert fields["5_1"] == "/On"
+
+
+def test_template_reloaded_after_edit(tmp_path):
+    import os
+
+    from checklist_batch import load_template
+
+    template = tmp_path / "form.pdf"
+    make_form_pdf(template)
+    first = load_template(template)
+    assert load_template(template) is first
+    make_form_pdf(template, title="Edited checklist template")
+    stat = template.stat()
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_template(template) is not first
@@ -0,0 +1,34 @@
+from benchmark import make_report, make_template
+from CLI_Tool import ErrCode, main
+
+
+def test_reports_in_one_folder_get_own_output(tmp_path):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    make_report(tmp_path / "hospA.xlsx", 40, locations=3, extra_columns=0, location_prefix="AAA")
+    make_report(tmp_path / "hospB.xlsx", 40, locations=2, extra_columns=0, location_prefix="BBB", seed=2)
+
+    code = main([str(tmp_path / "hospA.xlsx"), str(tmp_path / "hospB.xlsx"), "-t", str(template), "--no-cache"])
+    assert code == ErrCode.SUCCESS
+    for stem, prefix in (("hospA", "AAA"), ("hospB", "BBB")):
+        output_dir = tmp_path / "Output" / stem
+        assert (output_dir / "TotalModel.xlsx").is_file()
+        names = [path.name for path in output_dir.glob("*-*.xlsx")]
+        assert names and all(name.startswith(prefix) for name in names)
+
+
+def test_single_report_uses_output_folder(tmp_path):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    make_report(tmp_path / "report.xlsx", 20, locations=2, extra_columns=0)
+    assert main([str(tmp_path / "report.xlsx"), "-t", str(template), "--no-cache"]) == ErrCode.SUCCESS
+    assert (tmp_path / "Output" / "TotalModel.xlsx").is_file()
+
+
+def test_rejects_non_positive_batch_rows(tmp_path):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    make_report(tmp_path / "report.xlsx", 5, locations=1, extra_columns=0)
+    code = main([str(tmp_path / "report.xlsx"), "-t", str(template), "--low-memory", "--batch-rows", "0"])
+    assert code == ErrCode.INVALID_ARGUMENT
+    assert not (tmp_path / "Output").exists()
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from benchmark import make_report, make_template
+from excel_process import ExcelProcess, normalize_asset_ids
+
+
+def make_processor():
+    messages = []
+    return ExcelProcess(None, None, None, "report.xlsx", logger=messages.append), messages
+
+
+def test_normalize_asset_ids_all_blank():
+    result = normalize_asset_ids([np.nan, np.nan])
+    assert result.isna().all()
+
+
+def test_normalize_asset_ids_strips_leading_zeros():
+    assert normalize_asset_ids(["00123", 123, 123.0, " 0A1 "]).tolist() == ["123", "123", "123", "0A1"]
+
+
+def test_drop_duplicate_tasks_with_blank_work_orders():
+    processor, _ = make_processor()
+    df = pd.DataFrame({'Asset ID': [100, 100, 200], 'HA Work Order No': [np.nan, np.nan, np.nan]})
+    result = processor.drop_duplicate_tasks(df)
+    # 工单号为空的行不去重
+    assert len(result) == 3
+
+
+def test_drop_duplicate_tasks_keeps_last():
+    processor, _ = make_processor()
+    df = pd.DataFrame({'Asset ID': ["00100", 100, 200], 'HA Work Order No': [5, "5", 6], 'Row': [1, 2, 3]})
+    result = processor.drop_duplicate_tasks(df)
+    assert result['Row'].tolist() == [2, 3]
+
+
+def test_cancel_parallel_generation(tmp_path):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    report = tmp_path / "report.xlsx"
+    make_report(report, 200, locations=8, extra_columns=0)
+    messages = []
+    processor = ExcelProcess("Eng", "123", template, report, logger=messages.append, max_workers=2)
+    processor.bess_enabled = False
+    processor.report_cache = False
+    # 第一个Location完成后取消，其余Location不再生成
+    processor.progress = lambda done, total: processor.cancel()
+    assert processor.run() == 0
+    assert messages[-1] == "===========操作已取消!==========="
+    assert not (tmp_path / "Output" / "TotalModel.xlsx").exists()
+    assert len(list((tmp_path / "Output").glob("KWH-*.xlsx"))) < 8
+
+
+def test_invalid_schedule_dates_logged_once():
+    processor, messages = make_processor()
+    df = pd.DataFrame({'Schedule Date': ["2025-01-05", "bad", None, "32/13/2025"], 'Description': ["A"] * 4})
+    result = processor.add_pm_dates(df)
+    assert result['__schedule_label'].notna().tolist() == [True, False, False, False]
+    assert messages == ["警告: 2 个 Schedule Date 日期格式错误，例如: bad, 32/13/2025"]
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_header_messages_before_data_read(tmp_path, low_memory):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    report = tmp_path / "report.xlsx"
+    make_report(report, 50, locations=3, extra_columns=0)
+    wb = load_workbook(report)
+    wb.active['T1'] = "Other"  # ZT 栏位缺失
+    wb.save(report)
+
+    events = []
+    processor = ExcelProcess("Eng", "123", template, report, logger=None)
+    processor.logger = lambda message: events.append(
+        (message, 'read_report' in processor.profile.stages, processor.profile.counters.get('batches', 0)))
+    processor.bess_enabled = False
+    processor.report_cache = False
+    processor.read_engine = 'stream'
+    processor.low_memory = low_memory
+    processor.batch_rows = 10
+    assert processor.run() == 1
+    warnings = [event for event in events if event[0] == "警告: 表头未找到: ZT"]
+    # 只提示一次，且在读取数据之前
+    assert warnings == [("警告: 表头未找到: ZT", False, 0)]
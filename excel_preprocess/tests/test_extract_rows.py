@@ -0,0 +1,92 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from excel_process import ExcelProcess, parse_bess_assets
+
+
+def reference_rows(df, resolved_columns, bess_text, on_hold_enabled):
+    """改为向量化之前的逐行 iterrows 实现（基线版本），作为对照"""
+    raw_assets = [str(a).strip() for a in re.split(r"[\n,]+", bess_text) if a.strip()]
+    bess_assets = list(dict.fromkeys(raw_assets))
+    processed_data = []
+    for _, row in df.iterrows():
+        row_data = {}
+        for col_name, original_col_name in resolved_columns.items():
+            if original_col_name is not None:
+                value = row[original_col_name]
+                if col_name in ['Asset ID', 'HA Work Order No']:
+                    try:
+                        value = int(value) if pd.notna(value) else None
+                    except (TypeError, ValueError):
+                        pass
+                row_data[col_name] = value
+        status_value = row_data.get('Status')
+        location_value = row_data.get('Location')
+        asset_id = row_data.get('Asset ID')
+        asset_id_str = str(asset_id).strip() if pd.notna(asset_id) else ""
+        if bess_assets and asset_id_str in bess_assets:
+            row_data['__status_group'] = 'BESS'
+            row_data['Remark'] = 'BESS'
+            processed_data.append(row_data)
+            continue
+        if status_value == 'Accepted' and pd.notna(location_value) and str(location_value).strip() != "":
+            row_data['__status_group'] = 'Accepted'
+            processed_data.append(row_data)
+        elif on_hold_enabled and status_value == 'On Hold' and pd.notna(location_value) \
+                and str(location_value).strip() != "":
+            row_data['__status_group'] = 'On Hold'
+            row_data['Remark'] = 'On Hold'
+            processed_data.append(row_data)
+    return pd.DataFrame(processed_data)
+
+
+def make_report_df():
+    rnd = np.random.default_rng(3)
+    rows = 300
+    asset_ids = (100000 + np.arange(rows)).astype(float)
+    asset_ids[::37] = np.nan
+    locations = np.array([f"W{i % 9}" for i in range(rows)], dtype=object)
+    locations[::23] = np.nan
+    locations[5::41] = "  "
+    return pd.DataFrame({
+        'No': np.arange(rows),
+        'Asset ID': asset_ids,
+        'Hospital': "KWH",
+        'Location': locations,
+        'Manufacture': rnd.choice(["GE", "Philips"], rows),
+        'Model': rnd.choice(["M1", "M2", "800"], rows),
+        'Serial No': [f"SN{i}" for i in range(rows)],
+        'Description': rnd.choice(["DEFIBRILLATOR", "MONITOR"], rows),
+        'Status': rnd.choice(["Accepted", "On Hold", "Closed"], rows),
+        'HA Work Order No': np.where(np.arange(rows) % 11 == 0, np.nan, 5000000 + np.arange(rows)),
+        'Schedule Date': pd.Timestamp("2025-03-01"),
+        'Service Report Reference': [f"SR{i}" for i in range(rows)],
+        'ZT': "ZT1",
+    })
+
+
+def check_equivalent(bess_text, on_hold_enabled):
+    df = make_report_df()
+    processor = ExcelProcess(None, None, None, "report.xlsx", logger=lambda message: None)
+    processor.on_hold_enabled = on_hold_enabled
+    resolved = processor.resolve_columns(df.columns)
+    result = processor.extract_rows(df, resolved, parse_bess_assets(bess_text) if bess_text else {})
+    expected = reference_rows(df, resolved, bess_text, on_hold_enabled)
+    assert len(result) == len(expected)
+    for column in expected.columns:
+        pd.testing.assert_series_equal(result[column].reset_index(drop=True), expected[column],
+                                       check_dtype=False, check_names=False)
+
+
+def test_matches_iterrows_accepted_and_on_hold():
+    check_equivalent("", on_hold_enabled=True)
+
+
+def test_matches_iterrows_without_on_hold():
+    check_equivalent("", on_hold_enabled=False)
+
+
+def test_matches_iterrows_with_bess():
+    check_equivalent("100003\n100040, 100074\n999999", on_hold_enabled=True)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from location_shards import LocationShards
+
+
+def test_shards_round_trip_by_location():
+    df = pd.DataFrame({
+        'Location': ["W2", "W1", "W2", np.nan],
+        'Asset ID': [1, "A2", 3, 4],  # 混合类型，Arrow 不能原样保存
+        'Description': ["a", "b", "c", "d"],
+    })
+    with LocationShards() as shards:
+        shards.add(df.iloc[:2], df['Location'].iloc[:2])
+        shards.add(df.iloc[2:], df['Location'].iloc[2:])
+        groups = dict(iter(shards))
+        assert list(groups) == ["W1", "W2"]
+        assert groups["W2"]['Asset ID'].tolist() == [1, 3]
+        assert groups["W1"].equals(df.iloc[[1]].reset_index(drop=True))
+
+
+def test_uniform_shards_use_feather():
+    df = pd.DataFrame({'Location': ["W1", "W1"], 'Description': ["a", "b"], 'Count': [1, 2]})
+    with LocationShards() as shards:
+        shards.add(df, df['Location'])
+        if shards.use_feather:
+            assert [fmt for _, fmt, _ in shards.parts["W1"]] == ['feather']
+        assert shards.load("W1").equals(df)
@@ -0,0 +1,48 @@
+import pytest
+from openpyxl import load_workbook
+
+from benchmark import make_report, make_template
+from excel_process import ExcelProcess
+
+
+def sheet_values(path):
+    wb = load_workbook(path)
+    return {ws.title: [row for row in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+
+
+@pytest.mark.parametrize("batch_rows", [17, 5000])
+def test_low_memory_matches_full_read(tmp_path, batch_rows):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    report = tmp_path / "report.xlsx"
+    bess_assets = make_report(report, 150, locations=6, bess_fraction=0.05, extra_columns=0)
+    bess_assets.append("999")  # 总表中没有的 BESS Asset
+
+    outputs = {}
+    for mode in ("full", "low_memory"):
+        messages = []
+        processor = ExcelProcess("Eng", "123", template, report, logger=messages.append)
+        processor.on_hold_enabled = True
+        processor.bess_enabled = True
+        processor.bess_text = "\n".join(bess_assets)
+        processor.report_cache = False
+        processor.low_memory = mode == "low_memory"
+        processor.batch_rows = batch_rows
+        processor.output_dir = tmp_path / mode
+        assert processor.run() == 1
+        outputs[mode] = processor
+        assert any("999" in message for message in messages if "找不到" in message)
+
+    full_files = sorted(path.name for path in (tmp_path / "full").glob("*.xlsx"))
+    low_files = sorted(path.name for path in (tmp_path / "low_memory").glob("*.xlsx"))
+    assert "TotalModel.xlsx" in full_files
+    assert any(name.endswith("_BESS.xlsx") for name in full_files)
+    assert any(name.endswith("_OnHold.xlsx") for name in full_files)
+    assert low_files == full_files
+    for name in full_files:
+        assert sheet_values(tmp_path / "low_memory" / name) == sheet_values(tmp_path / "full" / name), name
+
+    counters = outputs["low_memory"].profile.counters
+    assert counters['processed_rows'] == outputs["full"].profile.counters['processed_rows']
+    if batch_rows == 17:
+        assert counters['batches'] > 1
@@ -0,0 +1,70 @@
+from benchmark import make_report, make_template
+from excel_process import ExcelProcess
+
+
+def run_report(report, template, **options):
+    messages = []
+    processor = ExcelProcess("Eng", "123", template, report, logger=messages.append)
+    processor.bess_enabled = False
+    processor.report_cache = False
+    for name, value in options.items():
+        setattr(processor, name, value)
+    assert processor.run() == 1
+    return processor, messages
+
+
+def location_files(output_dir, prefix):
+    return sorted(path.name for path in output_dir.glob(f"{prefix}-*.xlsx"))
+
+
+def test_two_reports_share_output_folder(tmp_path):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    report_a = tmp_path / "hospA.xlsx"
+    report_b = tmp_path / "hospB.xlsx"
+    make_report(report_a, 60, locations=4, extra_columns=0, location_prefix="AAA")
+    make_report(report_b, 60, locations=3, extra_columns=0, location_prefix="BBB", seed=2)
+    output_dir = tmp_path / "Output"
+
+    run_report(report_a, template)
+    files_a = location_files(output_dir, "AAA")
+    assert files_a
+
+    # 同一目录处理另一个总表不能删除第一个总表的分表
+    _, messages = run_report(report_b, template)
+    assert location_files(output_dir, "AAA") == files_a
+    assert location_files(output_dir, "BBB")
+    assert not any("已删除过期分表" in message for message in messages)
+
+    # 两个总表的记录都保留，再次运行第一个总表时全部跳过
+    processor, _ = run_report(report_a, template)
+    assert sorted(processor.skipped_files) == files_a
+
+
+
+def test_skip_rewrite_and_delete(tmp_path):
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    report = tmp_path / "report.xlsx"
+    make_report(report, 80, locations=4, extra_columns=0)
+    output_dir = tmp_path / "Output"
+
+    first, _ = run_report(report, template)
+    written = sorted(first.manifest_entries)
+    assert not first.skipped_files
+
+    # 输入未变：全部跳过
+    second, _ = run_report(report, template)
+    assert sorted(second.skipped_files) == written
+
+    # 工程师信息变化：全部重写
+    third, _ = run_report(report, template, pm_engineer="Other")
+    assert not third.skipped_files
+
+    # 总表中少了一些 Location：这些分表被删除
+    make_report(report, 80, locations=2, extra_columns=0)
+    fourth, messages = run_report(report, template, pm_engineer="Other")
+    remaining = sorted(path.name for path in output_dir.glob("KWH-*.xlsx"))
+    assert remaining == sorted(name for name in fourth.manifest_entries if name.startswith("KWH-"))
+    assert set(written) - set(fourth.manifest_entries)
+    assert any("已删除过期分表" in message for message in messages)
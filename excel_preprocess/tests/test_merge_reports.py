@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from benchmark import make_report, make_template
+from excel_process import ExcelProcess
+
+
+def make_reports(tmp_path):
+    """两个总表：前 30 行的 Asset ID 和工单号相同，第二个总表的 Asset ID 带前导零"""
+    report_a = tmp_path / "old.xlsx"
+    report_b = tmp_path / "new.xlsx"
+    make_report(report_a, 30, locations=3, extra_columns=0, location_prefix="OLD")
+    make_report(report_b, 40, locations=3, extra_columns=0, location_prefix="NEW", seed=2)
+    wb = load_workbook(report_b)
+    for (cell,) in wb.active.iter_rows(min_row=2, min_col=4, max_col=4):
+        cell.value = f"00{cell.value}"
+    wb.save(report_b)
+    return report_a, report_b
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merge_keeps_later_report(tmp_path, workers):
+    report_a, report_b = make_reports(tmp_path)
+    messages = []
+    processor = ExcelProcess("Eng", "123", None, report_a, logger=messages.append, max_workers=workers)
+    processor.report_cache = False
+
+    df = processor.read_merged_reports([report_a, report_b])
+    assert len(df) == 40
+    assert "合并后共 70 行, 去除重复工单 30 行" in messages
+    # 重复的工单保留后一个总表的记录
+    assert df['Location'].str.startswith("NEW").all()
+    assert sorted(pd.to_numeric(df['Asset ID']).tolist()) == list(range(1000000, 1000040))
+
+
+def test_merge_run_splits_deduplicated_rows(tmp_path):
+    report_a, report_b = make_reports(tmp_path)
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    processor = ExcelProcess("Eng", "123", template, report_a, logger=[].append)
+    processor.bess_enabled = False
+    processor.report_cache = False
+    processor.merge_reports = [report_a, report_b]
+    assert processor.run() == 1
+
+    counts = processor.profile.counters
+    assert counts['input_rows'] == 40
+    assert counts['duplicates_dropped'] == 30
+    assert not list((tmp_path / "Output").glob("OLD-*.xlsx"))
+    assert list((tmp_path / "Output").glob("NEW-*.xlsx"))
@@ -0,0 +1,53 @@
+import sys
+import threading
+
+import pytest
+
+from pdf_export import export_pdfs
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="假的 soffice 是 shebang 脚本")
+
+
+def fake_soffice(tmp_path):
+    """假的 soffice：为 --outdir 后的每个 xlsx 写一个同名 PDF"""
+    script = tmp_path / "soffice"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "from pathlib import Path\n"
+        "args = sys.argv[1:]\n"
+        "for f in args[args.index('--outdir') + 2:]:\n"
+        "    Path(f).with_suffix('.pdf').write_bytes(b'%PDF')\n"
+    )
+    script.chmod(0o755)
+    return str(script)
+
+
+def make_files(tmp_path, count):
+    files = []
+    for idx in range(count):
+        path = tmp_path / f"L{idx}.xlsx"
+        path.write_bytes(b"xlsx")
+        files.append(path)
+    return files
+
+
+def test_export_converts_all(tmp_path):
+    files = make_files(tmp_path, 3)
+    converted, skipped, failed, cancelled = export_pdfs(
+        files, batch_size=2, logger=lambda m: None, soffice=fake_soffice(tmp_path))
+    assert sorted(converted) == sorted(files)
+    assert (skipped, failed, cancelled) == ([], [], [])
+
+
+def test_cancelled_batches_are_not_failures(tmp_path):
+    files = make_files(tmp_path, 3)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    messages = []
+    converted, skipped, failed, cancelled = export_pdfs(
+        files, batch_size=2, logger=messages.append, cancel_event=cancel_event,
+        soffice=fake_soffice(tmp_path))
+    assert converted == [] and failed == []
+    assert sorted(cancelled) == sorted(files)
+    assert not any("失败" in message for message in messages)
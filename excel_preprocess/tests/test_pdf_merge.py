@@ -0,0 +1,51 @@
+import re
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from pdf_merge import A4, merge_directory, merge_pdfs_horizontally
+
+
+def make_pdf(path, texts):
+    """每页写一行文字的简单 PDF"""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    for text in texts:
+        page = writer.add_blank_page(A4[0], A4[1])
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})})
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 12 Tf 50 800 Td ({text}) Tj ET".encode())
+        page[NameObject('/Contents')] = writer._add_object(stream)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def test_two_up_output_is_readable(tmp_path):
+    make_pdf(tmp_path / "a.pdf", ["PAGE A1", "PAGE A2"])
+    make_pdf(tmp_path / "b.pdf", ["PAGE B1"])
+    output = tmp_path / "merged.pdf"
+    assert merge_directory([tmp_path], output) == 2
+
+    reader = PdfReader(output)
+    assert len(reader.pages) == 2
+    text = [page.extract_text() for page in reader.pages]
+    assert "PAGE A1" in text[0] and "PAGE A2" in text[0]
+    assert "PAGE B1" in text[1]
+    assert [float(value) for value in reader.pages[0].mediabox] == [0, 0, *A4]
+    # 坐标不能写成几十位的小数
+    contents = reader.pages[0].get_contents().get_data()
+    assert all(len(decimals) <= 4 for decimals in re.findall(rb'\.(\d+)', contents))
+
+
+def test_first_pages_only(tmp_path):
+    make_pdf(tmp_path / "a.pdf", ["PAGE A1", "PAGE A2"])
+    make_pdf(tmp_path / "b.pdf", ["PAGE B1", "PAGE B2"])
+    output = tmp_path / "merged.pdf"
+    assert merge_pdfs_horizontally(tmp_path / "a.pdf", tmp_path / "b.pdf", output) == 1
+    text = PdfReader(output).pages[0].extract_text()
+    assert "PAGE A1" in text and "PAGE B1" in text and "PAGE A2" not in text
@@ -0,0 +1,83 @@
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pm_rules import PmRuleEngine, is_missing, normalize_key
+
+RULES = [
+    {"name": "GE 监护仪", "manufacturer": "GE", "model": ["B40", "b650 "], "months": 3},
+    {"name": "除颤器", "description": "DEFIBRILLATOR", "months": 6},
+    {"name": "QEH 输液泵", "description_regex": "INFUSION|SYRINGE", "hospital": ["QEH"], "months": 4},
+    {"name": "数字型号", "model": "800", "months": 9},
+    {"name": "Mindray", "manufacturer": "mindray", "months": 18},
+    {"name": "监护仪", "description_regex": r"MONITOR,\s+PATIENT", "months": 24},
+    {"name": "PYN", "hospital": "PYN", "months": 1},
+]
+
+
+def reference_match(rules, manufacturer, model, description, hospital):
+    """逐条检查规则的原始写法，作为查找表的对照"""
+    values = {'manufacturer': normalize_key(manufacturer), 'model': normalize_key(model),
+              'hospital': normalize_key(hospital)}
+    for rule in rules:
+        if rule.regex is not None and (is_missing(description) or not rule.regex.search(str(description))):
+            continue
+        if all(values[key] in allowed for key, allowed in rule.conditions.items()):
+            return rule
+    return None
+
+
+def make_frame(rows, seed=1):
+    rnd = random.Random(seed)
+    return pd.DataFrame({
+        'Manufacture': [rnd.choice(['GE', ' ge', 'Philips', 'Mindray', None]) for _ in range(rows)],
+        'Model': [rnd.choice(['B40', 'B650', 800.0, '800', 'MX450', np.nan]) for _ in range(rows)],
+        'Description': [rnd.choice(['DEFIBRILLATOR', 'ECG DEFIBRILLATOR UNIT', 'PUMP, INFUSION', 'SYRINGE',
+                                    'MONITOR, PATIENT', 'defibrillator', None]) for _ in range(rows)],
+        'Hospital': [rnd.choice(['KWH', 'QEH', 'pyn', None]) for _ in range(rows)],
+    })
+
+
+@pytest.mark.parametrize("rules", [RULES, RULES[::-1]])
+def test_lookup_matches_linear_scan(rules):
+    engine = PmRuleEngine(rules, default_offset=12)
+    df = make_frame(500)
+    offsets, names = engine.apply(df)
+    for i, row in enumerate(df.itertuples(index=False)):
+        rule = reference_match(engine.rules, *row)
+        assert offsets.iloc[i] == (rule.months if rule else 12)
+        assert names.iloc[i] == (rule.name if rule else None)
+
+
+def test_unmergeable_regex_falls_back():
+    # 反向引用无法合并成一个正则时逐条匹配
+    engine = PmRuleEngine([{"name": "a", "description_regex": r"(A)\1", "months": 1},
+                           {"name": "b", "description_regex": r"(?i)pump", "months": 2}])
+    df = pd.DataFrame({'Description': ['XAAX', 'Pump', 'AB']})
+    assert engine.apply(df)[0].tolist() == [1, 2, 12]
+
+    # 合并后分组编号改变，反向引用会指向其他规则的分组
+    engine = PmRuleEngine([{"name": "b", "description_regex": "(B)X", "months": 1},
+                           {"name": "a", "description_regex": r"(A)\1", "months": 2}])
+    assert engine.apply(pd.DataFrame({'Description': ['AA', 'BX']}))[0].tolist() == [2, 1]
+
+
+def test_keywords_and_file(tmp_path):
+    engine = PmRuleEngine.from_keywords({'DEFIBRILLATOR': 6, 'PUMP': 3})
+    offsets, names = engine.apply(pd.DataFrame({'Description': ['ECG DEFIBRILLATOR', 'PUMP', 'VENTILATOR']}))
+    assert offsets.tolist() == [6, 3, 12]
+    assert names.tolist() == ['DEFIBRILLATOR', 'PUMP', None]
+
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"default_offset": 24, "rules": RULES}), encoding="utf-8")
+    engine = PmRuleEngine.from_file(path)
+    assert engine.default_offset == 24 and len(engine.rules) == len(RULES)
+
+    path.write_text(json.dumps([{"name": "bad", "description_regex": "(", "months": 1}]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        PmRuleEngine.from_file(path)
+    with pytest.raises(ValueError):
+        PmRuleEngine([{"name": "empty", "months": 1}])
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from report_cache import ReportCache
+
+
+def test_cache_is_kept_out_of_report_folder(tmp_path):
+    report = tmp_path / "reports" / "report.xlsx"
+    report.parent.mkdir()
+    report.write_bytes(b"report")
+    df = pd.DataFrame({'Asset ID': [1, "A2"], 'Location': ["W1", "W2"]})
+
+    cache = ReportCache(report, {'engine': 'stream'}, root=tmp_path / "cache")
+    cache.save(df, ['Asset ID', 'Location'])
+    assert list(report.parent.iterdir()) == [report]
+
+    loaded, header = ReportCache(report, {'engine': 'stream'}, root=tmp_path / "cache").load()
+    assert loaded.equals(df)
+    assert header == ['Asset ID', 'Location']
+
+
+def test_settings_change_misses(tmp_path):
+    report = tmp_path / "report.xlsx"
+    report.write_bytes(b"report")
+    ReportCache(report, {'engine': 'stream'}, root=tmp_path / "cache").save(pd.DataFrame({'A': [1]}), ['A'])
+    assert ReportCache(report, {'engine': 'calamine'}, root=tmp_path / "cache").load() is None
@@ -0,0 +1,110 @@
+import io
+import zipfile
+
+import numpy as np
+from openpyxl import Workbook, load_workbook
+from openpyxl.drawing.image import Image
+from PIL import Image as PILImage
+
+from xlsx_patch_writer import TemplatePatcher, cell_xml, share_duplicate_media
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (4, 4), 'red').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def workbook_with_images(sheet_count):
+    png = png_bytes()
+    wb = Workbook()
+    for index in range(sheet_count):
+        ws = wb.active if index == 0 else wb.create_sheet(f"S{index}")
+        ws['A1'] = index
+        ws.add_image(Image(io.BytesIO(png)), 'B2')
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def media_names(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return [name for name in archive.namelist() if name.startswith('xl/media/')]
+
+
+def test_single_sheet_with_image_is_returned_unchanged():
+    data = workbook_with_images(1)
+    result = share_duplicate_media(data)
+    assert result == data
+    assert load_workbook(io.BytesIO(result)).active['A1'].value == 0
+
+
+def test_duplicate_images_share_one_media_file():
+    data = workbook_with_images(3)
+    assert len(media_names(data)) == 3
+    result = share_duplicate_media(data)
+    assert len(media_names(result)) == 1
+    wb = load_workbook(io.BytesIO(result))
+    assert [ws['A1'].value for ws in wb.worksheets] == [0, 1, 2]
+    assert all(len(ws._images) == 1 for ws in wb.worksheets)
+
+
+def test_patch_writer_matches_openpyxl_writer(tmp_path):
+    from openpyxl.styles import Border, Font, PatternFill, Side
+
+    from benchmark import make_report, make_template
+    from excel_process import ExcelProcess
+
+    template = tmp_path / "template.xlsx"
+    make_template(template)
+    wb = load_workbook(template)
+    ws = wb.active
+    thin = Side(style='thin')
+    for row in range(6, 26):
+        for col in range(2, 15):
+            ws.cell(row=row, column=col).border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    ws['B6'].font = Font(bold=True)
+    ws['K6'].fill = PatternFill('solid', fgColor='FFFF00')
+    ws['K6'].number_format = '0.00'
+    wb.save(template)
+
+    outputs = {}
+    for writer in ('patch', 'openpyxl'):
+        folder = tmp_path / writer
+        folder.mkdir()
+        report = folder / "report.xlsx"
+        make_report(report, 120, locations=3, extra_columns=0)
+        processor = ExcelProcess("Eng", "123", template, report, logger=lambda message: None)
+        processor.bess_enabled = False
+        processor.report_cache = False
+        processor.xlsx_writer = writer
+        assert processor.run() == 1
+        outputs[writer] = folder / "Output"
+
+    names = sorted(path.name for path in outputs['patch'].glob("KWH-*.xlsx"))
+    assert names == sorted(path.name for path in outputs['openpyxl'].glob("KWH-*.xlsx"))
+    for name in names:
+        patched = load_workbook(outputs['patch'] / name).active
+        expected = load_workbook(outputs['openpyxl'] / name).active
+        assert patched.max_row == expected.max_row and patched.max_column == expected.max_column
+        assert sorted(map(str, patched.merged_cells.ranges)) == sorted(map(str, expected.merged_cells.ranges))
+        for row_a, row_b in zip(patched.iter_rows(), expected.iter_rows()):
+            for a, b in zip(row_a, row_b):
+                assert (a.coordinate, a.value) == (b.coordinate, b.value)
+                # 样式编号可能不同，比较样式内容
+                for attr in ('font', 'border', 'fill', 'alignment', 'protection'):
+                    assert repr(getattr(a, attr)) == repr(getattr(b, attr)), (a.coordinate, attr)
+                assert a.number_format == b.number_format
+
+
+def test_numbers_keep_full_precision():
+    assert cell_xml("A1", None, 12345678901234567) == '<c r="A1" t="n"><v>12345678901234567</v></c>'
+    assert cell_xml("A1", "3", np.int64(2 ** 62)) == f'<c r="A1" s="3" t="n"><v>{2 ** 62}</v></c>'
+    assert cell_xml("A1", None, 0.1) == '<c r="A1" t="n"><v>0.1</v></c>'
+    assert cell_xml("A1", None, np.float64(1 / 3)) == f'<c r="A1" t="n"><v>{1 / 3!r}</v></c>'
+
+    wb = Workbook()
+    patcher = TemplatePatcher(wb)
+    values = {(1, 1): 12345678901234567, (2, 1): 1 / 3, (3, 1): 1e-7}
+    ws = load_workbook(io.BytesIO(patcher.render(values))).active
+    assert [ws.cell(row=row, column=1).value for row in (1, 2, 3)] == [12345678901234567, 1 / 3, 1e-7]
@@ -3,7 +3,7 @@
 ################################################################################
 ## Form generated from reading UI file 'GEpmToolUI.ui'
 ##
-## Created by: Qt User Interface Compiler version 6.9.2
+## Created by: Qt User Interface Compiler version 6.12.0
 ##
 ## WARNING! All changes made in this file will be lost when recompiling UI file!
 ################################################################################
@@ -16,16 +16,16 @@ from PySide6.QtGui import (QAction, QBrush, QColor, QConicalGradient,
     QIcon, QImage, QKeySequence, QLinearGradient,
     QPainter, QPalette, QPixmap, QRadialGradient,
     QTransform)
-from PySide6.QtWidgets import (QApplication, QCheckBox, QLabel, QLineEdit,
-    QMainWindow, QMenu, QMenuBar, QPlainTextEdit,
-    QPushButton, QSizePolicy, QStatusBar, QToolButton,
-    QWidget)
+from PySide6.QtWidgets import (QApplication, QCheckBox, QComboBox, QLabel,
+    QLineEdit, QMainWindow, QMenu, QMenuBar,
+    QPlainTextEdit, QPushButton, QSizePolicy, QSpinBox,
+    QStatusBar, QToolButton, QWidget)
 
 class Ui_GEpmTool(object):
     def setupUi(self, GEpmTool):
         if not GEpmTool.objectName():
             GEpmTool.setObjectName(u"GEpmTool")
-        GEpmTool.resize(499, 587)
+        GEpmTool.resize(499, 667)
         self.actionReport = QAction(GEpmTool)
         self.actionReport.setObjectName(u"actionReport")
         self.actionPDF = QAction(GEpmTool)
@@ -40,16 +40,16 @@ class Ui_GEpmTool(object):
         self.centralwidget.setObjectName(u"centralwidget")
         self.pushButton = QPushButton(self.centralwidget)
         self.pushButton.setObjectName(u"pushButton")
-        self.pushButton.setGeometry(QRect(10, 484, 100, 32))
+        self.pushButton.setGeometry(QRect(10, 564, 100, 32))
         self.lineEdit_6 = QLineEdit(self.centralwidget)
         self.lineEdit_6.setObjectName(u"lineEdit_6")
         self.lineEdit_6.setGeometry(QRect(10, 194, 431, 21))
         self.pushButton_3 = QPushButton(self.centralwidget)
         self.pushButton_3.setObjectName(u"pushButton_3")
-        self.pushButton_3.setGeometry(QRect(130, 484, 100, 32))
+        self.pushButton_3.setGeometry(QRect(130, 564, 100, 32))
         self.pushButton_2 = QPushButton(self.centralwidget)
         self.pushButton_2.setObjectName(u"pushButton_2")
-        self.pushButton_2.setGeometry(QRect(250, 484, 100, 32))
+        self.pushButton_2.setGeometry(QRect(250, 564, 100, 32))
         self.label_5 = QLabel(self.centralwidget)
         self.label_5.setObjectName(u"label_5")
         self.label_5.setGeometry(QRect(10, 124, 121, 16))
@@ -79,14 +79,14 @@ class Ui_GEpmTool(object):
         self.toolButton.setGeometry(QRect(450, 144, 21, 21))
         self.plainTextEdit = QPlainTextEdit(self.centralwidget)
         self.plainTextEdit.setObjectName(u"plainTextEdit")
-        self.plainTextEdit.setGeometry(QRect(10, 254, 461, 221))
+        self.plainTextEdit.setGeometry(QRect(10, 334, 461, 221))
         self.plainTextEdit.setReadOnly(True)
         self.label_7 = QLabel(self.centralwidget)
         self.label_7.setObjectName(u"label_7")
-        self.label_7.setGeometry(QRect(10, 234, 81, 16))
+        self.label_7.setGeometry(QRect(10, 314, 81, 16))
         self.pushButton_4 = QPushButton(self.centralwidget)
         self.pushButton_4.setObjectName(u"pushButton_4")
-        self.pushButton_4.setGeometry(QRect(90, 230, 51, 25))
+        self.pushButton_4.setGeometry(QRect(90, 310, 51, 25))
         self.onHoldBox = QCheckBox(self.centralwidget)
         self.onHoldBox.setObjectName(u"onHoldBox")
         self.onHoldBox.setGeometry(QRect(160, 10, 85, 20))
@@ -106,6 +106,50 @@ class Ui_GEpmTool(object):
         self.plainTextEdit_3 = QPlainTextEdit(self.centralwidget)
         self.plainTextEdit_3.setObjectName(u"plainTextEdit_3")
         self.plainTextEdit_3.setGeometry(QRect(360, 30, 91, 111))
+        self.label_8 = QLabel(self.centralwidget)
+        self.label_8.setObjectName(u"label_8")
+        self.label_8.setGeometry(QRect(260, 282, 61, 16))
+        self.workersBox = QSpinBox(self.centralwidget)
+        self.workersBox.setObjectName(u"workersBox")
+        self.workersBox.setGeometry(QRect(330, 280, 61, 22))
+        self.workersBox.setMinimum(1)
+        self.workersBox.setMaximum(32)
+        self.incrementalBox = QCheckBox(self.centralwidget)
+        self.incrementalBox.setObjectName(u"incrementalBox")
+        self.incrementalBox.setGeometry(QRect(160, 50, 85, 20))
+        self.lowMemoryBox = QCheckBox(self.centralwidget)
+        self.lowMemoryBox.setObjectName(u"lowMemoryBox")
+        self.lowMemoryBox.setGeometry(QRect(160, 70, 85, 20))
+        self.pdfBox = QCheckBox(self.centralwidget)
+        self.pdfBox.setObjectName(u"pdfBox")
+        self.pdfBox.setGeometry(QRect(160, 90, 85, 20))
+        self.label_9 = QLabel(self.centralwidget)
+        self.label_9.setObjectName(u"label_9")
+        self.label_9.setGeometry(QRect(10, 282, 81, 16))
+        self.outputModeBox = QComboBox(self.centralwidget)
+        self.outputModeBox.addItem("")
+        self.outputModeBox.addItem("")
+        self.outputModeBox.addItem("")
+        self.outputModeBox.setObjectName(u"outputModeBox")
+        self.outputModeBox.setGeometry(QRect(100, 280, 121, 22))
+        self.label_10 = QLabel(self.centralwidget)
+        self.label_10.setObjectName(u"label_10")
+        self.label_10.setGeometry(QRect(10, 226, 111, 16))
+        self.lineEdit_7 = QLineEdit(self.centralwidget)
+        self.lineEdit_7.setObjectName(u"lineEdit_7")
+        self.lineEdit_7.setGeometry(QRect(125, 224, 316, 21))
+        self.toolButton_3 = QToolButton(self.centralwidget)
+        self.toolButton_3.setObjectName(u"toolButton_3")
+        self.toolButton_3.setGeometry(QRect(450, 224, 21, 21))
+        self.label_11 = QLabel(self.centralwidget)
+        self.label_11.setObjectName(u"label_11")
+        self.label_11.setGeometry(QRect(10, 254, 111, 16))
+        self.lineEdit_8 = QLineEdit(self.centralwidget)
+        self.lineEdit_8.setObjectName(u"lineEdit_8")
+        self.lineEdit_8.setGeometry(QRect(125, 252, 316, 21))
+        self.toolButton_4 = QToolButton(self.centralwidget)
+        self.toolButton_4.setObjectName(u"toolButton_4")
+        self.toolButton_4.setGeometry(QRect(450, 252, 21, 21))
         GEpmTool.setCentralWidget(self.centralwidget)
         self.statusbar = QStatusBar(GEpmTool)
         self.statusbar.setObjectName(u"statusbar")
@@ -162,6 +206,30 @@ class Ui_GEpmTool(object):
         self.label_4.setText(QCoreApplication.translate("GEpmTool", u"PM DurTime Rule", None))
         self.plainTextEdit_3.setPlainText("")
         self.plainTextEdit_3.setPlaceholderText(QCoreApplication.translate("GEpmTool", u"Unused Default PM Exp Time        12 Months Defibrillator   6 Months", None))
+        self.label_8.setText(QCoreApplication.translate("GEpmTool", u"Workers", None))
+#if QT_CONFIG(tooltip)
+        self.incrementalBox.setToolTip(QCoreApplication.translate("GEpmTool", u"\u53ea\u91cd\u5199\u6709\u53d8\u5316\u7684\u5206\u8868\uff0c\u53d6\u6d88\u52fe\u9009\u65f6\u91cd\u5199\u5168\u90e8\u5206\u8868", None))
+#endif // QT_CONFIG(tooltip)
+        self.incrementalBox.setText(QCoreApplication.translate("GEpmTool", u"Diff Only", None))
+#if QT_CONFIG(tooltip)
+        self.lowMemoryBox.setToolTip(QCoreApplication.translate("GEpmTool", u"\u5206\u6279\u8bfb\u53d6\u8d85\u5927\u603b\u8868\u5e76\u6682\u5b58\u5230\u78c1\u76d8\uff08\u4e0d\u4f7f\u7528\u7f13\u5b58\u548c\u5e76\u884c\u751f\u6210\uff09", None))
+#endif // QT_CONFIG(tooltip)
+        self.lowMemoryBox.setText(QCoreApplication.translate("GEpmTool", u"Low Mem", None))
+#if QT_CONFIG(tooltip)
+        self.pdfBox.setToolTip(QCoreApplication.translate("GEpmTool", u"\u751f\u6210\u540e\u7528 LibreOffice \u628a\u5206\u8868\u5bfc\u51fa\u4e3a PDF", None))
+#endif // QT_CONFIG(tooltip)
+        self.pdfBox.setText(QCoreApplication.translate("GEpmTool", u"PDF", None))
+        self.label_9.setText(QCoreApplication.translate("GEpmTool", u"Output Mode", None))
+        self.outputModeBox.setItemText(0, QCoreApplication.translate("GEpmTool", u"files", None))
+        self.outputModeBox.setItemText(1, QCoreApplication.translate("GEpmTool", u"hospital", None))
+        self.outputModeBox.setItemText(2, QCoreApplication.translate("GEpmTool", u"run", None))
+
+        self.label_10.setText(QCoreApplication.translate("GEpmTool", u"PM Rule File", None))
+        self.lineEdit_7.setPlaceholderText(QCoreApplication.translate("GEpmTool", u"Built-in rules", None))
+        self.toolButton_3.setText(QCoreApplication.translate("GEpmTool", u"...", None))
+        self.label_11.setText(QCoreApplication.translate("GEpmTool", u"Checklist PDF", None))
+        self.lineEdit_8.setPlaceholderText(QCoreApplication.translate("GEpmTool", u"No checklist", None))
+        self.toolButton_4.setText(QCoreApplication.translate("GEpmTool", u"...", None))
         self.menu.setTitle(QCoreApplication.translate("GEpmTool", u"Start", None))
         self.menu_2.setTitle(QCoreApplication.translate("GEpmTool", u"Help", None))
     # retranslateUi
@@ -0,0 +1,255 @@
+import hashlib
+import io
+import math
+import numbers
+import re
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+from openpyxl.compat import NUMERIC_TYPES
+from openpyxl.utils import column_index_from_string, get_column_letter, range_boundaries
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_RE = re.compile(r'<row\b([^>]*?)(?:/>|>(.*?)</row>)', re.S)
+CELL_RE = re.compile(r'<c\b[^>]*?(?:/>|>.*?</c>)', re.S)
+CELL_REF_RE = re.compile(r'\br="([A-Z]+)(\d+)"')
+ROW_NUM_RE = re.compile(r'\br="(\d+)"')
+STYLE_RE = re.compile(r'\bs="(\d+)"')
+MODIFIED_RE = re.compile(r'(<dcterms:modified\b[^>]*>)[^<]*(</dcterms:modified>)')
+
+
+class UnsupportedValue(Exception):
+    """无法直接写入 XML 的值（公式、日期、非法字符等），调用方应改用 openpyxl"""
+
+
+def cell_xml(ref, style, value):
+    """生成与 openpyxl 写出相同的 <c> 元素（字符串写为 inlineStr）"""
+    attrs = f'r="{ref}"' + (f' s="{style}"' if style else '')
+    if isinstance(value, bool):
+        return f'<c {attrs} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, NUMERIC_TYPES):
+        if not math.isfinite(value):
+            raise UnsupportedValue(value)
+        # 整数原样写出（超过 16 位也不丢失），浮点数用可还原原值的最短表示
+        text = str(int(value)) if isinstance(value, numbers.Integral) else repr(float(value))
+        return f'<c {attrs} t="n"><v>{text}</v></c>'
+    if isinstance(value, str):
+        value = value[:32767]
+        if ILLEGAL_CHARACTERS_RE.search(value) or (len(value) > 1 and value.startswith("=")) \
+                or value in ERROR_CODES:
+            raise UnsupportedValue(value)
+        if not value:
+            return f'<c {attrs} t="inlineStr" />'
+        space = ' xml:space="preserve"' if value.strip() and value != value.strip() else ''
+        return f'<c {attrs} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    raise UnsupportedValue(value)
+
+
+def zip_entry(name, data, level=6):
+    """压缩一个 zip 成员，返回 (文件名, crc, 压缩后数据, 原始大小)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    return name.encode('utf-8'), zlib.crc32(data), compressed, len(data)
+
+
+def build_zip(entries):
+    """按顺序拼接已压缩的成员，生成 zip 文件内容（成员不需要重新压缩）"""
+    now = time.localtime()
+    dos_time = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+    dos_date = ((now.tm_year - 1980) << 9) | (now.tm_mon << 5) | now.tm_mday
+    body = io.BytesIO()
+    directory = []
+    for name, crc, compressed, size in entries:
+        offset = body.tell()
+        header = (20, 0, zipfile.ZIP_DEFLATED, dos_time, dos_date, crc, len(compressed), size, len(name))
+        body.write(struct.pack('<4s5H3L2H', b'PK\x03\x04', *header, 0))
+        body.write(name)
+        body.write(compressed)
+        directory.append(struct.pack('<4s6H3L5H2L', b'PK\x01\x02', 20, *header, 0, 0, 0, 0, 0, offset) + name)
+    start = body.tell()
+    for record in directory:
+        body.write(record)
+    body.write(struct.pack('<4s4H2LH', b'PK\x05\x06', 0, 0, len(directory), len(directory),
+                           body.tell() - start, start, 0))
+    return body.getvalue()
+
+
+def share_duplicate_media(data):
+    """openpyxl 为每个工作表的图片各存一份；内容相同的图片改为共用第一份，返回新的 xlsx 内容"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        members = {info.filename: archive.read(info.filename) for info in archive.infolist()}
+    first = {}
+    duplicates = {}  # 重复的图片 -> 保留的图片
+    for name, content in members.items():
+        if name.startswith('xl/media/'):
+            kept = first.setdefault(hashlib.sha256(content).digest(), name)
+            if kept != name:
+                duplicates[name] = kept
+    if not duplicates:
+        return data
+
+    target_re = re.compile(r'Target="([^"]*?media/[^"]+)"')
+
+    def retarget(match):
+        target = match.group(1)
+        for old, new in duplicates.items():
+            if target.endswith('/' + PurePosixPath(old).name):
+                return f'Target="{target[:-len(PurePosixPath(old).name)]}{PurePosixPath(new).name}"'
+        return match.group(0)
+
+    for name in members:
+        if name.endswith('.rels') and b'media/' in members[name]:
+            members[name] = target_re.sub(retarget, members[name].decode('utf-8')).encode('utf-8')
+    for name in duplicates:
+        del members[name]
+    return build_zip([zip_entry(name, content) for name, content in members.items()])
+
+
+class TemplatePatcher:
+    """把已预处理的模板保存一次并拆开工作表 XML，之后每个分表只替换需要写入的单元格"""
+
+    def __init__(self, wb):
+        ws = wb.active
+        self.values = {(cell.row, cell.column): cell.value
+                       for row in ws.iter_rows() for cell in row if cell.value is not None}
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        with zipfile.ZipFile(buffer) as archive:
+            self.names = [info.filename for info in archive.infolist()]
+            members = {name: archive.read(name) for name in self.names}
+
+        self.sheet_name = self.active_sheet_path(members)
+        self.core_name = 'docProps/core.xml' if 'docProps/core.xml' in members else None
+        self.core_xml = members[self.core_name].decode('utf-8') if self.core_name else None
+        self.split_sheet(members[self.sheet_name].decode('utf-8'))
+        # 不变的成员只压缩一次
+        self.entries = {
+            name: zip_entry(name, data)
+            for name, data in members.items() if name not in (self.sheet_name, self.core_name)
+        }
+
+    @staticmethod
+    def active_sheet_path(members):
+        workbook = ElementTree.fromstring(members['xl/workbook.xml'])
+        view = workbook.find(f'{{{MAIN_NS}}}bookViews/{{{MAIN_NS}}}workbookView')
+        active = int(view.get('activeTab', 0)) if view is not None else 0
+        sheets = workbook.findall(f'{{{MAIN_NS}}}sheets/{{{MAIN_NS}}}sheet')
+        rel_id = sheets[active].get(f'{{{REL_NS}}}id')
+        rels = ElementTree.fromstring(members['xl/_rels/workbook.xml.rels'])
+        for rel in rels.iter(f'{{{PACKAGE_REL_NS}}}Relationship'):
+            if rel.get('Id') == rel_id:
+                target = rel.get('Target')
+                if target.startswith('/'):
+                    return target[1:]
+                return str(PurePosixPath('xl') / target)
+        raise KeyError(rel_id)
+
+    def split_sheet(self, xml):
+        """拆成 sheetData 前后的固定部分和逐行的 XML"""
+        match = re.search(r'<sheetData\s*/>|<sheetData>(.*?)</sheetData>', xml, re.S)
+        self.head = xml[:match.start()]
+        self.tail = xml[match.end():]
+        self.rows = {}  # 行号 -> (<row ...> 属性, {列号: <c> XML})
+        self.row_xml = {}  # 行号 -> 原始 XML
+        for row_match in ROW_RE.finditer(match.group(1) or ''):
+            number = int(ROW_NUM_RE.search(row_match.group(1)).group(1))
+            cells = {}
+            for cell in CELL_RE.findall(row_match.group(2) or ''):
+                cells[column_index_from_string(CELL_REF_RE.search(cell).group(1))] = cell
+            self.rows[number] = (row_match.group(1), cells)
+            self.row_xml[number] = row_match.group(0)
+
+        # 合并区域中非左上角的单元格不能写值（与 openpyxl 一样交给调用方报错）
+        self.merged = set()
+        for ref in re.findall(r'<mergeCell ref="([A-Z0-9:]+)"', self.tail):
+            min_col, min_row, max_col, max_row = range_boundaries(ref)
+            self.merged.update((row, col) for row in range(min_row, max_row + 1)
+                               for col in range(min_col, max_col + 1))
+            self.merged.discard((min_row, min_col))
+
+        dimension = re.search(r'<dimension ref="([A-Z0-9:]+)"', self.head)
+        self.bounds = range_boundaries(dimension.group(1)) if dimension else None
+
+    def value(self, row, column):
+        """模板中原有的单元格值"""
+        return self.values.get((row, column))
+
+    def render_sheet(self, cells):
+        patched = {}
+        for (row, column), value in cells.items():
+            if (row, column) in self.merged:
+                raise UnsupportedValue(f"merged cell {get_column_letter(column)}{row}")
+            patched.setdefault(row, {})[column] = value
+
+        parts = [self.head_with_dimension(cells), '<sheetData>']
+        for number in sorted(set(self.rows) | set(patched)):
+            if number not in patched:
+                parts.append(self.row_xml[number])
+                continue
+            attrs, template_cells = self.rows.get(number, (f' r="{number}"', {}))
+            row_cells = dict(template_cells)
+            for column, value in patched[number].items():
+                # 保留模板单元格原有的样式
+                old = template_cells.get(column)
+                style = STYLE_RE.search(old.split('>', 1)[0]) if old else None
+                row_cells[column] = cell_xml(f"{get_column_letter(column)}{number}",
+                                             style.group(1) if style else None, value)
+            parts.append(f'<row{attrs}>' + ''.join(row_cells[col] for col in sorted(row_cells)) + '</row>')
+        parts.append('</sheetData>')
+        parts.append(self.tail)
+        return ''.join(parts)
+
+    def head_with_dimension(self, cells):
+        if not self.bounds or not cells:
+            return self.head
+        min_col, min_row, max_col, max_row = self.bounds
+        rows = [row for row, _ in cells]
+        columns = [col for _, col in cells]
+        ref = (f"{get_column_letter(min(min_col, *columns))}{min(min_row, *rows)}:"
+               f"{get_column_letter(max(max_col, *columns))}{max(max_row, *rows)}")
+        return re.sub(r'<dimension ref="[A-Z0-9:]+"', f'<dimension ref="{ref}"', self.head, count=1)
+
+    def render(self, cells):
+        """cells: {(行, 列): 值}，返回 xlsx 文件内容；值不受支持时抛出 UnsupportedValue"""
+        generated = {self.sheet_name: zip_entry(self.sheet_name, self.render_sheet(cells).encode('utf-8'))}
+        if self.core_name:
+            modified = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            core = MODIFIED_RE.sub(rf'\g<1>{modified}\g<2>', self.core_xml, count=1)
+            generated[self.core_name] = zip_entry(self.core_name, core.encode('utf-8'))
+        entries = [generated.get(name) or self.entries[name] for name in self.names]
+        return build_zip(entries)
+
+
+class PatcherCache:
+    """按模板文件 (mtime, size) 缓存 TemplatePatcher，模板修改后自动重建"""
+
+    def __init__(self, load):
+        self.load = load
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, template_path):
+        path = Path(template_path)
+        stat = path.stat()
+        key = str(path.resolve())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                entry = (stat.st_mtime_ns, stat.st_size, self.load(path))
+                self._entries[key] = entry
+            return entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()